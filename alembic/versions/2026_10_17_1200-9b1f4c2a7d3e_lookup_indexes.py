@@ -0,0 +1,39 @@
+"""lookup indexes
+
+Revision ID: 9b1f4c2a7d3e
+Revises: 335bcd812d6d
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f4c2a7d3e'
+down_revision: Union[str, None] = '335bcd812d6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY so that building them on a populated database does not
+    # block writes; it cannot run inside the migration transaction.
+    # users.email is already covered by the users_email_key unique constraint.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_sessions_token', 'auth_sessions', ['token'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_projects_user_id', 'projects', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_user_id_project_id_created_at', 'tasks', ['user_id', 'project_id', sa.text('created_at DESC')], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_setting_user_id', 'users_setting', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_subscription_user_id', 'users_subscription', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_subscription_user_id', table_name='users_subscription', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_setting_user_id', table_name='users_setting', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_user_id_project_id_created_at', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_projects_user_id', table_name='projects', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_auth_sessions_token', table_name='auth_sessions', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,51 @@
+"""change seq and tombstones
+
+Revision ID: 4e8a2d6c1b05
+Revises: 9b1f4c2a7d3e
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8a2d6c1b05'
+down_revision: Union[str, None] = '9b1f4c2a7d3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # constant server defaults: no table rewrite on Postgres 11+
+    op.add_column('users', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_user_id_change_seq', 'tombstones', ['user_id', 'change_seq'], unique=False)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_projects_user_id_change_seq', 'projects', ['user_id', 'change_seq'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_user_id_change_seq', 'tasks', ['user_id', 'change_seq'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_user_id_change_seq', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_projects_user_id_change_seq', table_name='projects', postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_tombstones_user_id_change_seq', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_column('tasks', 'change_seq')
+    op.drop_column('projects', 'change_seq')
+    op.drop_column('users', 'change_seq')
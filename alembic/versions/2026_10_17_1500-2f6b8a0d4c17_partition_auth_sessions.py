@@ -0,0 +1,83 @@
+"""partition auth_sessions
+
+Revision ID: 2f6b8a0d4c17
+Revises: 7c3d9e1f2a64
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+from app import config
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b8a0d4c17'
+down_revision: Union[str, None] = '7c3d9e1f2a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def _month_start(day: date, months: int = 0) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # Rebuild auth_sessions as RANGE (expired_at) partitioned table. Expired
+    # sessions are not carried over. The id sequence is kept.
+    op.execute("ALTER TABLE auth_sessions RENAME TO auth_sessions_old")
+    op.execute("ALTER SEQUENCE auth_sessions_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE auth_sessions (
+            id INTEGER NOT NULL DEFAULT nextval('auth_sessions_id_seq'),
+            user_id INTEGER NOT NULL,
+            token VARCHAR NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            expired_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        ) PARTITION BY RANGE (expired_at)
+    """)
+    # catches rows outside the monthly partitions, e.g. if the reaper stalls
+    op.execute("CREATE TABLE auth_sessions_default PARTITION OF auth_sessions DEFAULT")
+    # as many months ahead as the session reaper keeps creating
+    today = date.today()
+    for offset in range(config.AUTH_SESSION_PARTITIONS_AHEAD + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        op.execute(
+            f"CREATE TABLE auth_sessions_p{start:%Y%m} PARTITION OF auth_sessions "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    op.execute("""
+        INSERT INTO auth_sessions (id, user_id, token, created_at, expired_at)
+        SELECT id, user_id, token, created_at, expired_at
+        FROM auth_sessions_old WHERE expired_at > now()
+    """)
+    op.drop_table('auth_sessions_old')
+    op.execute("ALTER SEQUENCE auth_sessions_id_seq OWNED BY auth_sessions.id")
+    op.create_primary_key('auth_sessions_pkey', 'auth_sessions', ['id', 'expired_at'])
+    op.create_foreign_key('auth_sessions_user_id_fkey', 'auth_sessions', 'users', ['user_id'], ['id'])
+    op.create_index('ix_auth_sessions_token', 'auth_sessions', ['token', 'expired_at'], unique=True)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE auth_sessions RENAME TO auth_sessions_partitioned")
+    op.execute("ALTER SEQUENCE auth_sessions_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE auth_sessions (
+            id INTEGER NOT NULL DEFAULT nextval('auth_sessions_id_seq'),
+            user_id INTEGER NOT NULL,
+            token VARCHAR NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            expired_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("""
+        INSERT INTO auth_sessions (id, user_id, token, created_at, expired_at)
+        SELECT id, user_id, token, created_at, expired_at
+        FROM auth_sessions_partitioned WHERE expired_at > now()
+    """)
+    op.drop_table('auth_sessions_partitioned')  # drops the partitions too
+    op.execute("ALTER SEQUENCE auth_sessions_id_seq OWNED BY auth_sessions.id")
+    op.create_primary_key('auth_sessions_pkey', 'auth_sessions', ['id'])
+    op.create_foreign_key('auth_sessions_user_id_fkey', 'auth_sessions', 'users', ['user_id'], ['id'])
+    op.create_index('ix_auth_sessions_token', 'auth_sessions', ['token'], unique=True)
@@ -0,0 +1,36 @@
+"""task search vector
+
+Revision ID: 5d2e7a9c3f81
+Revises: 2f6b8a0d4c17
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e7a9c3f81'
+down_revision: Union[str, None] = '2f6b8a0d4c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites tasks under an ACCESS EXCLUSIVE
+    # lock; on a large table run this in a maintenance window.
+    op.add_column('tasks', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))", persisted=True), nullable=True))
+    # btree_gin lets user_id live in the same GIN index as the vector.
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_user_id_search_vector', 'tasks', ['user_id', 'search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_user_id_search_vector', table_name='tasks', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
+    # btree_gin is left installed; other objects may depend on it.
+    op.drop_column('tasks', 'search_vector')
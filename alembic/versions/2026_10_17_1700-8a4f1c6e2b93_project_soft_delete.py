@@ -0,0 +1,31 @@
+"""project soft delete
+
+Revision ID: 8a4f1c6e2b93
+Revises: 5d2e7a9c3f81
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f1c6e2b93'
+down_revision: Union[str, None] = '5d2e7a9c3f81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # nullable without default: catalog-only change, no table rewrite
+    op.add_column('projects', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_projects_deleted_at', 'projects', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_projects_deleted_at', table_name='projects', postgresql_where=sa.text('deleted_at IS NOT NULL'), postgresql_concurrently=True, if_exists=True)
+    op.drop_column('projects', 'deleted_at')
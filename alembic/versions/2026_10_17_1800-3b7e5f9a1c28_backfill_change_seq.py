@@ -0,0 +1,41 @@
+"""backfill change seq
+
+Revision ID: 3b7e5f9a1c28
+Revises: 8a4f1c6e2b93
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e5f9a1c28'
+down_revision: Union[str, None] = '8a4f1c6e2b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows from before 4e8a2d6c1b05 kept change_seq 0, which /sync (change_seq
+    # > since) never returns. Stamp them with a new per-user seq, so full
+    # syncs and every existing token both pick them up as a change.
+    op.execute(
+        "UPDATE users u SET change_seq = u.change_seq + 1 "
+        "WHERE EXISTS (SELECT 1 FROM projects p WHERE p.user_id = u.id AND p.change_seq = 0) "
+        "OR EXISTS (SELECT 1 FROM tasks t WHERE t.user_id = u.id AND t.change_seq = 0)"
+    )
+    op.execute(
+        "UPDATE projects p SET change_seq = u.change_seq FROM users u "
+        "WHERE p.user_id = u.id AND p.change_seq = 0"
+    )
+    op.execute(
+        "UPDATE tasks t SET change_seq = u.change_seq FROM users u "
+        "WHERE t.user_id = u.id AND t.change_seq = 0"
+    )
+
+
+def downgrade() -> None:
+    # the stamps are valid change_seqs; nothing to undo
+    pass
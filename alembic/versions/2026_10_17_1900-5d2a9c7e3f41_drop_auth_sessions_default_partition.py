@@ -0,0 +1,52 @@
+"""drop auth_sessions default partition
+
+Revision ID: 5d2a9c7e3f41
+Revises: 3b7e5f9a1c28
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a9c7e3f41'
+down_revision: Union[str, None] = '3b7e5f9a1c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The reaper detaches expired partitions CONCURRENTLY, which Postgres
+    # refuses while a default partition exists; its rows would also make
+    # creating the matching monthly partition fail. Live rows move to
+    # monthly partitions, expired ones are dropped with it.
+    op.execute("ALTER TABLE auth_sessions DETACH PARTITION auth_sessions_default")
+    op.execute("DELETE FROM auth_sessions_default WHERE expired_at <= now()")
+    op.execute("""
+        DO $$
+        DECLARE month date;
+        BEGIN
+            FOR month IN
+                SELECT DISTINCT date_trunc('month', expired_at)::date FROM auth_sessions_default
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF auth_sessions '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'auth_sessions_p' || to_char(month, 'YYYYMM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute("""
+        INSERT INTO auth_sessions (id, user_id, token, created_at, expired_at)
+        SELECT id, user_id, token, created_at, expired_at FROM auth_sessions_default
+    """)
+    op.drop_table('auth_sessions_default')
+
+
+def downgrade() -> None:
+    op.execute("CREATE TABLE auth_sessions_default PARTITION OF auth_sessions DEFAULT")
@@ -0,0 +1,170 @@
+import re
+from time import perf_counter
+from typing import Optional
+import orjson
+from app import config
+from app.database import pool_wait_stats
+
+# request classes, in the order they are shed last to first
+CRITICAL, NORMAL, BULK = 0, 1, 2
+PRIORITY_NAMES = ("critical", "normal", "bulk")
+
+# listings, search, sync and bulk transfer: expensive, and clients can retry
+_BULK_PATH = re.compile(r"^/(projects(/\d+/tasks)?|tasks/search|sync|export)/?$")
+# latency that says nothing about DB load: password hashing (bounded by its
+# own queue) and import uploads paced by the client
+_UNSAMPLED_PREFIXES = ("/auth/", "/import")
+
+
+def classify(method: str, path: str) -> Optional[int]:
+    """None: never shed (CORS preflights, health checks and metrics)."""
+    if method == "OPTIONS" or path.startswith("/internal/") or path == "/metrics":
+        return None
+    if path.startswith("/auth/"):
+        return CRITICAL
+    if path == "/import":
+        return BULK
+    if method not in ("GET", "HEAD"):
+        return CRITICAL
+    if _BULK_PATH.match(path):
+        return BULK
+    return NORMAL
+
+
+class AdaptiveLimit:
+    """Per-worker concurrency limit, adjusted once per window (AIMD).
+
+    The limit shrinks multiplicatively when requests wait on the connection
+    pool or take much longer than their long-run average, and grows by one
+    when the limit was what held requests back. CRITICAL requests may use all
+    of it; NORMAL and BULK only their share, so the headroom is kept for
+    logins and writes.
+    """
+
+    def __init__(self):
+        self.limit = float(config.ADMISSION_INITIAL_LIMIT)
+        self.in_flight = 0
+        self.rejected = [0, 0, 0]
+        self.baseline: Optional[float] = None  # long-run mean latency
+        self._shares = (1.0, config.ADMISSION_NORMAL_SHARE, config.ADMISSION_BULK_SHARE)
+        self._started = perf_counter()
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        self._peak = 0
+        self._window_rejected = 0
+        self._checkouts = pool_wait_stats["checkouts"]
+        self._wait_seconds = pool_wait_stats["wait_seconds"]
+
+    def try_acquire(self, priority: int) -> bool:
+        if self.in_flight >= max(1, int(self.limit * self._shares[priority])):
+            self.rejected[priority] += 1
+            self._window_rejected += 1
+            return False
+        self.in_flight += 1
+        if self.in_flight > self._peak:
+            self._peak = self.in_flight
+        return True
+
+    def release(self, latency: Optional[float]):
+        """latency: seconds to the response start, None to not sample it."""
+        self.in_flight -= 1
+        if latency is not None:
+            self._latency_sum += latency
+            self._latency_count += 1
+        now = perf_counter()
+        if now - self._started >= config.ADMISSION_WINDOW_SECONDS:
+            self._adjust()
+            self._started = now
+
+    def _adjust(self):
+        checkouts = pool_wait_stats["checkouts"] - self._checkouts
+        waited = pool_wait_stats["wait_seconds"] - self._wait_seconds
+        self._checkouts = pool_wait_stats["checkouts"]
+        self._wait_seconds = pool_wait_stats["wait_seconds"]
+        pool_wait_ms = waited / checkouts * 1000 if checkouts else 0.0
+
+        latency = self._latency_sum / self._latency_count if self._latency_count else None
+        slow = False
+        if latency is not None:
+            if self.baseline is None:
+                self.baseline = latency
+            slow = latency > self.baseline * config.ADMISSION_LATENCY_TOLERANCE
+            self.baseline += (latency - self.baseline) * config.ADMISSION_BASELINE_WEIGHT
+
+        if pool_wait_ms > config.ADMISSION_TARGET_POOL_WAIT_MS or slow:
+            self.limit = max(
+                float(config.ADMISSION_MIN_LIMIT), self.limit * config.ADMISSION_BACKOFF
+            )
+        elif self._window_rejected or self._peak >= int(self.limit * self._shares[BULK]):
+            # only grow a limit that was actually reached, or it drifts to the max
+            self.limit = min(float(config.ADMISSION_MAX_LIMIT), self.limit + 1)
+
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        self._peak = self.in_flight
+        self._window_rejected = 0
+
+
+limiter = AdaptiveLimit()
+
+
+def admission_stats() -> dict:
+    return {
+        "limit": limiter.limit,
+        "in_flight": limiter.in_flight,
+        "baseline_seconds": limiter.baseline or 0.0,
+        **{
+            f"rejected_{name}": count
+            for name, count in zip(PRIORITY_NAMES, limiter.rejected)
+        },
+    }
+
+
+class AdmissionMiddleware:
+    """Sheds load with 503 + Retry-After once the adaptive limit is reached,
+    instead of letting requests queue on the connection pool until they all
+    time out."""
+
+    def __init__(self, app):
+        self.app = app
+        self.rejection = orjson.dumps({"detail": "Server is busy, try again later"})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        priority = classify(scope["method"], scope["path"])
+        if priority is None:
+            return await self.app(scope, receive, send)
+        if not limiter.try_acquire(priority):
+            return await self._reject(send)
+
+        started = perf_counter()
+        sampled = not scope["path"].startswith(_UNSAMPLED_PREFIXES)
+        latency = None
+
+        async def send_with_latency(message):
+            nonlocal latency
+            # up to the response start: streamed export bodies are paced by
+            # the client
+            if message["type"] == "http.response.start" and sampled:
+                latency = perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_latency)
+        finally:
+            limiter.release(latency)
+
+    async def _reject(self, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self.rejection)).encode()),
+                    (b"retry-after", str(config.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": self.rejection})
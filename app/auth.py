@@ -1,26 +1,140 @@
-from typing_extensions import Annotated
-from fastapi import Depends, HTTPException
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing_extensions import Annotated, Optional, Tuple
+from fastapi import Depends, HTTPException, Header
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app import config
-from app.database import get_session
+from app.database import get_session, async_session_maker, read_session_maker
+from app.cache import auth_session_cache
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from app.queries import user as user_queries
 from app.schemas import user as user_schemas
-from app.models import user as user_models
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.BCRYPT_ROUNDS
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/swagger/token")
 
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_stats = {"in_flight": 0, "completed": 0, "rejected": 0, "busy_seconds": 0.0}
 
-async def hash_password(password: str):
-    return pwd_context.hash(password)
 
+async def _run_hasher(func, *args):
+    if _hash_stats["in_flight"] >= (
+        config.PASSWORD_HASH_WORKERS + config.PASSWORD_HASH_MAX_QUEUE
+    ):
+        _hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+    _hash_stats["in_flight"] += 1
+    started = perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_stats["in_flight"] -= 1
+        _hash_stats["completed"] += 1
+        _hash_stats["busy_seconds"] += perf_counter() - started
+
+
+def password_hasher_stats() -> dict:
+    return {
+        "workers": config.PASSWORD_HASH_WORKERS,
+        "max_queue": config.PASSWORD_HASH_MAX_QUEUE,
+        "queue_depth": max(0, _hash_stats["in_flight"] - config.PASSWORD_HASH_WORKERS),
+        **_hash_stats,
+    }
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hasher(pwd_context.hash, password)
+
+
+async def password_verify(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hasher(pwd_context.verify, plain_password, hashed_password)
+
+
+async def password_verify_and_update(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Returns (verified, new_hash); new_hash is set when the stored hash is outdated,
+    e.g. after BCRYPT_ROUNDS was raised."""
+    return await _run_hasher(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+# bump when the stateless claim layout changes; older tokens fall back to the DB
+STATELESS_TOKEN_VERSION = 1
+
+
+class SessionDenylist:
+    """Ids of revoked auth sessions that have not expired yet.
+
+    Fed locally on logout and from revoked_auth_sessions by
+    run_denylist_refresher, so revocations reach every worker within
+    AUTH_DENYLIST_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # session_id -> expired_at
+        self._last_id = 0
+        self._reloaded_at = None
+
+    def add(self, session_id: int, expired_at: datetime):
+        self._revoked[session_id] = expired_at
+
+    def is_revoked(self, session_id: int) -> bool:
+        return session_id in self._revoked
+
+    async def refresh(self, db_session: AsyncSession):
+        """Reads rows above the highest id seen minus an overlap: a logout
+        can commit a lower id after a higher one was already read. A full
+        reload every AUTH_DENYLIST_FULL_RELOAD_SECONDS catches anything
+        slower than the overlap covers. Revocations are never undone, so
+        rows are only ever merged in."""
+        now = datetime.now()
+        after_id = max(0, self._last_id - config.AUTH_DENYLIST_OVERLAP_IDS)
+        reload_due = self._reloaded_at is None or (
+            (now - self._reloaded_at).total_seconds()
+            >= config.AUTH_DENYLIST_FULL_RELOAD_SECONDS
+        )
+        if reload_due:
+            after_id = 0
+            self._reloaded_at = now
+        for row in await user_queries.get_revoked_auth_sessions(after_id, db_session):
+            self._revoked[row.session_id] = row.expired_at
+            self._last_id = max(self._last_id, row.id)
+        for session_id, expired_at in list(self._revoked.items()):
+            if expired_at <= now:
+                del self._revoked[session_id]
+
+    def __len__(self) -> int:
+        return len(self._revoked)
 
-async def password_verify(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+
+session_denylist = SessionDenylist()
+
+
+async def run_denylist_refresher():
+    while True:
+        try:
+            async with async_session_maker() as db_session:
+                await session_denylist.refresh(db_session)
+        except Exception as e:
+            print(f"Error refreshing session denylist - {e}")
+        await asyncio.sleep(config.AUTH_DENYLIST_REFRESH_SECONDS)
 
 
 def create_access_token(data: dict):
@@ -33,7 +147,7 @@ def create_access_token(data: dict):
 
 async def get_current_auth_session(
     token: str = Depends(oauth2_scheme), db_session: AsyncSession = Depends(get_session)
-):
+) -> user_schemas.AuthPrincipalSchema:
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -44,17 +158,69 @@ async def get_current_auth_session(
         token_session: str = payload.get("sub")
         if token_session is None:
             raise credentials_exception
-        auth_session = await user_queries.get_auth_session(token_session, db_session)
-        if not auth_session:
+        if config.AUTH_STATELESS and payload.get("ver") == STATELESS_TOKEN_VERSION:
+            if session_denylist.is_revoked(payload["sid"]):
+                raise credentials_exception
+            return user_schemas.AuthPrincipalSchema(
+                token=token_session,
+                session_id=payload["sid"],
+                user=user_schemas.UserSchema.model_validate(payload["usr"]),
+            )
+        principal = auth_session_cache.get(token_session)
+        if principal:
+            return principal
+        principal = await resolve_auth_session(token_session, db_session)
+        if not principal:
             raise credentials_exception
-        return auth_session
-    except JWTError:
+        return principal
+    except (JWTError, KeyError, ValueError):
         raise credentials_exception
 
 
+async def resolve_auth_session(
+    token_session: str, db_session: AsyncSession
+) -> Optional[user_schemas.AuthPrincipalSchema]:
+    """Loads the session's principal from the DB and caches it."""
+    auth_session = await user_queries.get_auth_session(token_session, db_session)
+    if not auth_session:
+        return None
+    principal = user_schemas.AuthPrincipalSchema(
+        token=auth_session.token,
+        session_id=auth_session.id,
+        user=user_schemas.UserSchema.model_validate(
+            auth_session.user, from_attributes=True
+        ),
+    )
+    auth_session_cache.set(
+        token_session,
+        principal,
+        ttl=(auth_session.expired_at - datetime.now()).total_seconds(),
+    )
+    return principal
+
+
+async def issue_access_token(token_session: str, db_session: AsyncSession) -> str:
+    """JWT for a freshly created auth session.
+
+    In AUTH_STATELESS mode the token also carries the session id and the
+    principal, so get_current_auth_session can skip the DB entirely.
+    """
+    claims = {"sub": token_session}
+    if config.AUTH_STATELESS:
+        principal = await resolve_auth_session(token_session, db_session)
+        claims.update(
+            {
+                "ver": STATELESS_TOKEN_VERSION,
+                "sid": principal.session_id,
+                "usr": principal.user.model_dump(mode="json"),
+            }
+        )
+    return create_access_token(claims)
+
+
 async def get_current_user(
-    auth_session: str = Depends(get_current_auth_session), db_session: AsyncSession = Depends(get_session)
-):
+    auth_session: user_schemas.AuthPrincipalSchema = Depends(get_current_auth_session),
+) -> user_schemas.UserSchema:
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -69,8 +235,30 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: Annotated[user_models.User, Depends(get_current_user)],
-):
+    current_user: Annotated[user_schemas.UserSchema, Depends(get_current_user)],
+) -> user_schemas.UserSchema:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_read_session(
+    current_user: Annotated[user_schemas.UserSchema, Depends(get_current_active_user)],
+) -> AsyncSession:
+    """Session for read-only endpoints: a replica, unless the user's own recent
+    writes may not have replicated yet. Nothing is committed."""
+    async with read_session_maker(current_user.id)() as session:
+        yield session
+
+
+async def verify_internal_access(
+    x_internal_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """X-Internal-Token, or `Authorization: Bearer` for Prometheus scrapers."""
+    if not x_internal_token and authorization and authorization.startswith("Bearer "):
+        x_internal_token = authorization[len("Bearer ") :]
+    if not config.INTERNAL_API_TOKEN or not secrets.compare_digest(
+        x_internal_token or "", config.INTERNAL_API_TOKEN
+    ):
+        raise HTTPException(status_code=404, detail="Not Found")
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
+from app import config
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after `ttl` seconds.
+
+    max_size None: unbounded, entries only go when they expire (expired ones
+    at the least recently used end are dropped on every set)."""
+
+    def __init__(self, max_size: Optional[int], ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.max_size is not None and self.max_size <= 0:
+            return
+        now = monotonic()
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = (value, now + ttl)
+        self._data.move_to_end(key)
+        if self.max_size is None:
+            while self._data and next(iter(self._data.values()))[1] <= now:
+                self._data.popitem(last=False)
+            return
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        item = self._data.pop(key, None)
+        return item[0] if item else None
+
+    def pop_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drops every entry whose value matches; a full scan."""
+        keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# session token -> user_schemas.AuthPrincipalSchema
+auth_session_cache = TTLCache(
+    max_size=config.AUTH_CACHE_MAX_SIZE, ttl=config.AUTH_CACHE_TTL_SECONDS
+)
+
+# user id -> True while the user's latest writes may not have reached replicas;
+# unbounded, as evicting a writer early would send them to a stale replica
+recent_writers = TTLCache(max_size=None, ttl=config.READ_YOUR_WRITES_SECONDS)
@@ -14,3 +14,112 @@ POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
+# read replicas for GET endpoints: comma-separated host[:port], same user/db
+POSTGRES_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+# after a write the user reads from the primary for this long (replica lag budget)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# in-process cache of resolved auth sessions (per worker); logouts and user
+# changes evict entries on every worker through NOTIFY on AUTH_EVENTS_CHANNEL
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+AUTH_EVENTS_CHANNEL = os.getenv("AUTH_EVENTS_CHANNEL", "tm_auth")
+
+# keyset pagination for list endpoints
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+# password hashing (bcrypt runs in a dedicated thread pool)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+# /internal/* endpoints are disabled unless a token is configured
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+# connection pool, per uvicorn worker: Postgres needs at least
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = bool(int(os.getenv("DB_POOL_PRE_PING", "1")))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "30")) or None
+
+# POST /projects/{id}/tasks:batch
+TASK_BATCH_MAX_OPERATIONS = int(os.getenv("TASK_BATCH_MAX_OPERATIONS", "500"))
+
+# realtime change events (Postgres NOTIFY -> /ws)
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "tm_events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_RECONNECT_SECONDS = float(os.getenv("EVENTS_RECONNECT_SECONDS", "2"))
+
+# stateless mode: access tokens carry the principal and are verified without a
+# DB lookup; revocations are propagated through a background-refreshed denylist
+AUTH_STATELESS = bool(int(os.getenv("AUTH_STATELESS", "0")))
+AUTH_DENYLIST_REFRESH_SECONDS = float(os.getenv("AUTH_DENYLIST_REFRESH_SECONDS", "5"))
+# serial ids commit out of order: each refresh re-reads this many ids below
+# the highest seen, and every full-reload interval all unexpired rows
+AUTH_DENYLIST_OVERLAP_IDS = int(os.getenv("AUTH_DENYLIST_OVERLAP_IDS", "1000"))
+AUTH_DENYLIST_FULL_RELOAD_SECONDS = float(
+    os.getenv("AUTH_DENYLIST_FULL_RELOAD_SECONDS", "300")
+)
+
+# expired auth session reaper (runs in every worker, one at a time)
+AUTH_REAPER_ENABLED = bool(int(os.getenv("AUTH_REAPER_ENABLED", "1")))
+AUTH_REAPER_INTERVAL_SECONDS = float(os.getenv("AUTH_REAPER_INTERVAL_SECONDS", "300"))
+AUTH_REAPER_BATCH_SIZE = int(os.getenv("AUTH_REAPER_BATCH_SIZE", "1000"))
+AUTH_SESSION_PARTITIONS_AHEAD = int(os.getenv("AUTH_SESSION_PARTITIONS_AHEAD", "2"))
+
+# projects with more tasks than this are soft-deleted and purged in the background
+PROJECT_DELETE_SYNC_MAX_TASKS = int(os.getenv("PROJECT_DELETE_SYNC_MAX_TASKS", "5000"))
+PROJECT_PURGE_ENABLED = bool(int(os.getenv("PROJECT_PURGE_ENABLED", "1")))
+PROJECT_PURGE_INTERVAL_SECONDS = float(os.getenv("PROJECT_PURGE_INTERVAL_SECONDS", "30"))
+PROJECT_PURGE_BATCH_SIZE = int(os.getenv("PROJECT_PURGE_BATCH_SIZE", "5000"))
+
+# bulk export/import (GET /export, POST /import)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(1024 * 1024)))
+# the upload is spooled to a temporary file before loading; bigger ones are 413
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(1024 * 1024 * 1024)))
+IMPORT_SPOOL_MEMORY = int(os.getenv("IMPORT_SPOOL_MEMORY", str(1024 * 1024)))
+
+# startup warm-up: pool connections opened per engine (capped at DB_POOL_SIZE)
+WARMUP_ENABLED = bool(int(os.getenv("WARMUP_ENABLED", "1")))
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+
+# adaptive admission control, per worker: requests over the limit get 503
+ADMISSION_ENABLED = bool(int(os.getenv("ADMISSION_ENABLED", "1")))
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "32"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "4"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "256"))
+ADMISSION_WINDOW_SECONDS = float(os.getenv("ADMISSION_WINDOW_SECONDS", "1"))
+# shrink the limit when the mean pool wait or the latency (vs its long-run
+# average) of a window goes over these
+ADMISSION_TARGET_POOL_WAIT_MS = float(os.getenv("ADMISSION_TARGET_POOL_WAIT_MS", "20"))
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "2"))
+ADMISSION_BASELINE_WEIGHT = float(os.getenv("ADMISSION_BASELINE_WEIGHT", "0.05"))
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.9"))
+# share of the limit single-resource reads and listings/bulk may use
+ADMISSION_NORMAL_SHARE = float(os.getenv("ADMISSION_NORMAL_SHARE", "0.9"))
+ADMISSION_BULK_SHARE = float(os.getenv("ADMISSION_BULK_SHARE", "0.6"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+# production server (python -m app.server); every worker has its own DB pool,
+# so Postgres sees up to WEB_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "0"))  # 0: one per available CPU
+WEB_BACKLOG = int(os.getenv("WEB_BACKLOG", "2048"))
+# keep above the idle timeout of whatever proxies/clients reuse connections
+WEB_KEEP_ALIVE_SECONDS = int(os.getenv("WEB_KEEP_ALIVE_SECONDS", "65"))
+WEB_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("WEB_GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+# statements slower than this are logged with their endpoint
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
@@ -1,12 +1,65 @@
+from itertools import cycle
+from time import perf_counter
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, declared_attr
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app import config
+from app.cache import recent_writers
 
 
-DATABASE_URL = f"postgresql+asyncpg://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{config.POSTGRES_HOST}/{config.POSTGRES_DB}"
+def _database_url(host: str) -> str:
+    return f"postgresql+asyncpg://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{host}/{config.POSTGRES_DB}"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+
+DATABASE_URL = _database_url(config.POSTGRES_HOST)
+REPLICA_URLS = [_database_url(host) for host in config.POSTGRES_REPLICA_HOSTS]
+# plain asyncpg DSN for connections kept outside the pool (LISTEN)
+ASYNCPG_DSN = f"postgresql://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{config.POSTGRES_HOST}/{config.POSTGRES_DB}"
+
+pool_wait_stats = {"checkouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = perf_counter() - started
+            pool_wait_stats["checkouts"] += 1
+            pool_wait_stats["wait_seconds"] += waited
+            if waited > pool_wait_stats["max_wait_seconds"]:
+                pool_wait_stats["max_wait_seconds"] = waited
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            "command_timeout": config.DB_COMMAND_TIMEOUT,
+        },
+    )
+
+
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in REPLICA_URLS]
+
+async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+_replica_session_makers = cycle(
+    [async_sessionmaker(replica, expire_on_commit=False) for replica in replica_engines]
+)
 
 
 class Base(AsyncAttrs, DeclarativeBase):
@@ -18,6 +71,47 @@ class Base(AsyncAttrs, DeclarativeBase):
 
 
 async def get_session() -> AsyncSession:
-    async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    """One transaction per request: committed after the endpoint returns and
+    before the response is sent, rolled back if anything raised (including
+    HTTPException). Query functions never commit on their own."""
     async with async_session_maker() as session:
-        yield session
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+def mark_write(user_id: int):
+    """Pins the user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    recent_writers.set(user_id, True)
+
+
+def read_session_maker(user_id: int) -> async_sessionmaker:
+    """Round-robin over the replicas, or the primary when there are none or
+    the user wrote recently enough that a replica may still be behind."""
+    if not replica_engines or recent_writers.get(user_id):
+        return async_session_maker
+    return next(_replica_session_makers)
+
+
+def pool_status() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "timeout": config.DB_POOL_TIMEOUT,
+        **pool_wait_stats,
+        "replicas": [
+            {
+                "size": replica.pool.size(),
+                "checked_out": replica.pool.checkedout(),
+                "overflow": replica.pool.overflow(),
+            }
+            for replica in replica_engines
+        ],
+    }
@@ -0,0 +1,69 @@
+import hashlib
+from typing import Optional
+from fastapi import HTTPException, Request, Response, status
+
+# Responses are per-user: clients may keep them but must revalidate.
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_etag(user_id: int, change_seq: int, request: Request) -> str:
+    """Every write to a user's projects/tasks bumps users.change_seq, so the
+    counter plus the URL identifies the exact bytes of a list response."""
+    digest = hashlib.blake2b(
+        f"{user_id}:{request.url.path}?{request.url.query}".encode(), digest_size=6
+    ).hexdigest()
+    return f'"c{change_seq}-{digest}"'
+
+
+def resource_etag(prefix: str, row_id: int, change_seq: int) -> str:
+    """prefix: "p" for projects, "t" for tasks"""
+    return f'"{prefix}{row_id}.{change_seq}"'
+
+
+def content_etag(body: bytes) -> str:
+    return f'"m{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _tags(header: str) -> list:
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def matches(request: Request, etag: str) -> bool:
+    """If-None-Match, weak comparison (RFC 9110 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def expected_change_seq(request: Request, prefix: str, row_id: int) -> Optional[int]:
+    """The change_seq an If-Match header pins the row to; None without the
+    header or with If-Match: *. Any tag that can never match the row is a 412
+    right away (strong comparison, so weak tags never match)."""
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    expected = f'"{prefix}{row_id}.'
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith(expected) and tag.endswith('"'):
+            try:
+                return int(tag[len(expected) : -1])
+            except ValueError:
+                break
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed"
+    )
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+import asyncpg
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from app import config
+from app.cache import auth_session_cache
+from app.database import ASYNCPG_DSN, mark_write
+
+# sent to subscribers that may have missed events; clients should call /sync
+RESYNC_EVENT = json.dumps({"type": "resync"})
+
+
+async def publish(session: AsyncSession, user_id: int, event_type: str, data: dict):
+    """Queues a change event in the current transaction.
+
+    Postgres delivers NOTIFY only on commit, so rolled back writes publish
+    nothing. Payloads stay small (ids + change_seq); clients fetch the rows
+    through /sync.
+    """
+    payload = json.dumps(
+        {"type": event_type, "user_id": user_id, **data}, separators=(",", ":")
+    )
+    await session.execute(select(func.pg_notify(config.EVENTS_CHANNEL, payload)))
+    mark_write(user_id)
+
+
+async def publish_auth_eviction(
+    session: AsyncSession, token: Optional[str] = None, user_id: Optional[int] = None
+):
+    """Evicts cached principals on every worker once the transaction commits:
+    the session `token`, or all of `user_id`'s sessions (deactivation,
+    profile changes). The calling worker also evicts right away."""
+    if token:
+        auth_session_cache.pop(token)
+    if user_id is not None:
+        _evict_user(user_id)
+    payload = json.dumps({"token": token, "user_id": user_id}, separators=(",", ":"))
+    await session.execute(select(func.pg_notify(config.AUTH_EVENTS_CHANNEL, payload)))
+
+
+def _evict_user(user_id: int):
+    auth_session_cache.pop_where(lambda principal: principal.user.id == user_id)
+
+
+class EventBroker:
+    """One LISTEN connection per worker, fanned out to per-user queues.
+
+    Also listens on AUTH_EVENTS_CHANNEL to keep the worker's auth cache in
+    step with logouts on other workers."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._conn: Optional[asyncpg.Connection] = None
+        self._connecting: Optional[asyncio.Future] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def start(self):
+        self._closed = False
+        if self._conn is not None and not self._conn.is_closed():
+            return
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect())
+        try:
+            await asyncio.shield(self._connecting)
+        finally:
+            if self._connecting is not None and self._connecting.done():
+                self._connecting = None
+
+    async def _connect(self):
+        conn = await asyncpg.connect(ASYNCPG_DSN)
+        conn.add_termination_listener(self._on_terminate)
+        await conn.add_listener(config.EVENTS_CHANNEL, self._on_notify)
+        await conn.add_listener(config.AUTH_EVENTS_CHANNEL, self._on_auth_notify)
+        self._conn = conn
+
+    async def stop(self):
+        self._closed = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
+
+    def _on_terminate(self, conn):
+        self._conn = None
+        # evictions sent while disconnected are lost: start from a cold cache
+        auth_session_cache.clear()
+        self._broadcast(RESYNC_EVENT)
+        if not self._closed and self._reconnect_task is None:
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        try:
+            while not self._closed:
+                await asyncio.sleep(config.EVENTS_RECONNECT_SECONDS)
+                try:
+                    await self.start()
+                except Exception as e:
+                    print(f"Error reconnecting event listener - {e}")
+                    continue
+                # events committed while we were disconnected are lost
+                auth_session_cache.clear()
+                self._broadcast(RESYNC_EVENT)
+                return
+        finally:
+            self._reconnect_task = None
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        try:
+            user_id = json.loads(payload)["user_id"]
+        except Exception:
+            return
+        # the write may have come from another worker
+        mark_write(user_id)
+        for queue in self._subscribers.get(user_id, ()):
+            self._put(queue, payload)
+
+    def _on_auth_notify(self, conn, pid, channel, payload: str):
+        try:
+            data = json.loads(payload)
+        except Exception:
+            return
+        if data.get("token"):
+            auth_session_cache.pop(data["token"])
+        if data.get("user_id") is not None:
+            _evict_user(data["user_id"])
+
+    def _broadcast(self, payload: str):
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, payload)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, payload: str):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # slow consumer: drop the backlog and tell it to resync instead
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int):
+        await self.start()
+        queue = asyncio.Queue(maxsize=config.EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+
+broker = EventBroker()
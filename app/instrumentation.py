@@ -0,0 +1,197 @@
+import contextvars
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from typing import Optional
+from sqlalchemy import event
+from app import config
+from app.database import engine, replica_engines
+
+logger = logging.getLogger("app.sql")
+
+# seconds; shared by the request and statement duration histograms
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    __slots__ = ("endpoint", "queries", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+
+_request_stats: contextvars.ContextVar = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+# (method, route, status) -> request duration
+request_durations = defaultdict(Histogram)
+# (method, route) -> [statements, seconds]
+request_db = defaultdict(lambda: [0, 0.0])
+statement_durations = Histogram()
+slow_statements = 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # on the execution context, not the pooled connection: a failed statement
+    # never reaches after_cursor_execute and would leave its start behind
+    context._query_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global slow_statements
+    elapsed = perf_counter() - context._query_started
+    statement_durations.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if elapsed > stats.slowest_seconds:
+            stats.slowest_seconds = elapsed
+            stats.slowest_statement = statement
+    if elapsed * 1000 >= config.SLOW_QUERY_MS:
+        slow_statements += 1
+        logger.warning(
+            "slow query %.1fms endpoint=%s: %s",
+            elapsed * 1000,
+            stats.endpoint if stats else "-",
+            " ".join(statement.split()),
+        )
+
+
+for _engine in (engine, *replica_engines):
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Per-request SQL statement count and DB time, exposed as a Server-Timing
+    header and aggregated per route for /metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(f"{scope['method']} {scope['path']}")
+        token = _request_stats.set(stats)
+        started = perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = (
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                    f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}, "
+                    f"app;dur={(perf_counter() - started) * 1000:.1f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", timing.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            request_durations[(scope["method"], path, status_code)].observe(
+                perf_counter() - started
+            )
+            db = request_db[(scope["method"], path)]
+            db[0] += stats.queries
+            db[1] += stats.db_seconds
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def _labels(**labels) -> str:
+    return ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+
+
+def _histogram(lines: list, name: str, histogram: Histogram, **labels):
+    cumulative = 0
+    for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{name}_bucket{{{_labels(**labels, le=le)}}} {cumulative}")
+    label_str = f"{{{_labels(**labels)}}}" if labels else ""
+    lines.append(f"{name}_sum{label_str} {histogram.total}")
+    lines.append(f"{name}_count{label_str} {histogram.count}")
+
+
+def render_metrics(gauges: dict) -> str:
+    """Prometheus text exposition format."""
+    lines = [
+        "# HELP http_request_duration_seconds HTTP request duration.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), histogram in sorted(request_durations.items()):
+        _histogram(
+            lines,
+            "http_request_duration_seconds",
+            histogram,
+            method=method,
+            route=route,
+            status=status,
+        )
+    lines += [
+        "# HELP http_request_db_queries_total SQL statements issued by requests.",
+        "# TYPE http_request_db_queries_total counter",
+    ]
+    for (method, route), (queries, _) in sorted(request_db.items()):
+        lines.append(
+            f"http_request_db_queries_total{{{_labels(method=method, route=route)}}} {queries}"
+        )
+    lines += [
+        "# HELP http_request_db_seconds_total Time requests spent in SQL statements.",
+        "# TYPE http_request_db_seconds_total counter",
+    ]
+    for (method, route), (_, seconds) in sorted(request_db.items()):
+        lines.append(
+            f"http_request_db_seconds_total{{{_labels(method=method, route=route)}}} {seconds}"
+        )
+    lines += [
+        "# HELP db_statement_duration_seconds SQL statement duration.",
+        "# TYPE db_statement_duration_seconds histogram",
+    ]
+    _histogram(lines, "db_statement_duration_seconds", statement_durations)
+    lines += [
+        f"# HELP db_slow_statements_total Statements slower than {config.SLOW_QUERY_MS}ms.",
+        "# TYPE db_slow_statements_total counter",
+        f"db_slow_statements_total {slow_statements}",
+    ]
+    for name, value in sorted(gauges.items()):
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,12 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List
+from typing import Optional, Union
 from fastapi.security import OAuth2PasswordRequestForm
 from typing_extensions import Annotated
-from fastapi import FastAPI, Depends, status, HTTPException
+from fastapi import FastAPI, Depends, status, HTTPException, Query, Request, Response
+from fastapi import WebSocket
+from app import database
 from app.database import get_session
 from app import config
 from app.schemas import user as user_schemas
@@ -10,15 +14,54 @@ from app.schemas import base as base_schemas
 from app.schemas import project as project_schemas
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from app import auth as auth_tools
+from app import pagination
+from app import events
+from app import maintenance
+from app import instrumentation
+from app import serializers
+from app import etags
+from app import admission
+from app import warmup
+from app import transfer
 from app.queries import user as user_queries
 from app.models import user as user_models
 from app.queries import project as project_queries
 from app.models import project as project_models
 from uuid import uuid4
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, ORJSONResponse, StreamingResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = []
+    if config.AUTH_STATELESS:
+        background.append(asyncio.ensure_future(auth_tools.run_denylist_refresher()))
+    if config.AUTH_REAPER_ENABLED:
+        background.append(asyncio.ensure_future(maintenance.run_auth_session_reaper()))
+    if config.PROJECT_PURGE_ENABLED:
+        background.append(asyncio.ensure_future(maintenance.run_project_purger()))
+    if database.replica_engines or config.AUTH_CACHE_MAX_SIZE > 0:
+        # other workers' writes arrive as NOTIFY and pin their users to the
+        # primary; their logouts evict cached auth sessions here
+        await events.broker.start()
+    if config.WARMUP_ENABLED:
+        # uvicorn accepts connections only once startup has finished; the
+        # outcome (and any engine left cold) is logged on app.warmup
+        await warmup.warm_up()
+    yield
+    for task in background:
+        task.cancel()
+    # let them unwind (close their sessions) before the pools go away
+    await asyncio.gather(*background, return_exceptions=True)
+    await events.broker.stop()
+    for db_engine in (database.engine, *database.replica_engines):
+        await db_engine.dispose()
 
 
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     debug=config.DEBUG,
     title="Task Manager",
     version="0.0.1",
@@ -28,13 +71,17 @@ app = FastAPI(
 
 origins = ["*"]
 
+# inside CORS, so browsers can read the 503s
+app.add_middleware(admission.AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
+app.add_middleware(instrumentation.MetricsMiddleware)
 
 
 # =====================================AUTH===========================================
@@ -62,6 +109,11 @@ async def register_api(
         {"user_id": user.id, "name": "Default", "is_active": True, "is_default": True},
         db_session,
     )
+    if not user_settings or not project:
+        # rolls back the user as well: registration is one transaction
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Something was wrong"
+        )
 
     return {"message": "Success!"}
 
@@ -75,8 +127,13 @@ async def login_api(
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=404, detail="User is not active")
-    if not await auth_tools.password_verify(data.password, user.password):
+    verified, new_hash = await auth_tools.password_verify_and_update(
+        data.password, user.password
+    )
+    if not verified:
         raise HTTPException(status_code=404, detail="User not found")
+    if new_hash:
+        await user_queries.update_user(user.id, {"password": new_hash}, db_session)
     token_hex = uuid4().hex
     auth_session = await user_queries.create_auth_session(
         {
@@ -87,7 +144,7 @@ async def login_api(
         },
         db_session,
     )
-    token = auth_tools.create_access_token({"sub": token_hex})
+    token = await auth_tools.issue_access_token(token_hex, db_session)
     return {"token": token}
 
 
@@ -95,12 +152,17 @@ async def login_api(
     "/auth/logout", response_model=base_schemas.SuccessResponseSchema, tags=["auth"]
 )
 async def logout_api(
-    auth_session: user_models.AuthSession = Depends(
+    auth_session: user_schemas.AuthPrincipalSchema = Depends(
         auth_tools.get_current_auth_session
     ),
     db_session: AsyncSession = Depends(get_session),
 ):
     await user_queries.delete_auth_session(auth_session.token, db_session)
+    if auth_session.session_id:
+        auth_tools.session_denylist.add(
+            auth_session.session_id,
+            datetime.now() + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES),
+        )
     return {"message": "Success!"}
 
 
@@ -114,8 +176,13 @@ async def login_swagger_api(
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=404, detail="User is not active")
-    if not await auth_tools.password_verify(form_data.password, user.password):
+    verified, new_hash = await auth_tools.password_verify_and_update(
+        form_data.password, user.password
+    )
+    if not verified:
         raise HTTPException(status_code=404, detail="User not found")
+    if new_hash:
+        await user_queries.update_user(user.id, {"password": new_hash}, db_session)
 
     token_hex = uuid4().hex
     auth_session = await user_queries.create_auth_session(
@@ -127,16 +194,24 @@ async def login_swagger_api(
         },
         db_session,
     )
-    token = auth_tools.create_access_token({"sub": token_hex})
+    token = await auth_tools.issue_access_token(token_hex, db_session)
 
     return {"access_token": token, "token_type": "bearer"}
 
 
 @app.get("/me", response_model=user_schemas.UserSchema, tags=["user"])
 async def me_api(
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    request: Request,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
 ):
-    return user
+    # the principal comes from the auth cache / token, so hashing it is the cheap part
+    body = user.model_dump_json().encode()
+    etag = etags.content_etag(body)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    response = Response(content=body, media_type="application/json")
+    etags.set_headers(response, etag)
+    return response
 
 
 # ================================Project=================================
@@ -147,7 +222,7 @@ async def me_api(
 )
 async def create_project_api(
     data: project_schemas.ProjectInSchema,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
     db_session: AsyncSession = Depends(get_session),
 ):
     data_dict = data.model_dump()
@@ -163,16 +238,51 @@ async def create_project_api(
 
 @app.get(
     "/projects",
-    response_model=List[project_schemas.ProjectOutSchema],
+    response_model=Union[
+        project_schemas.ProjectPageOutSchema,
+        project_schemas.ProjectWithCountsPageOutSchema,
+    ],
     tags=["projects"],
 )
 async def get_projects_api(
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
-    db_session: AsyncSession = Depends(get_session),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    with_counts: bool = False,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(auth_tools.get_read_session),
 ):
-    print(user.id)
-    projects = await project_queries.get_projects(user_id=user.id, session=db_session)
-    return projects
+    limit = pagination.clamp_limit(limit)
+    try:
+        after = pagination.decode_created_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    # read before the rows: the ETag may lag the body, never run ahead of it
+    change_seq = await user_queries.get_user_change_seq(user.id, db_session)
+    etag = etags.collection_etag(user.id, change_seq, request)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    projects = await project_queries.get_project_rows(
+        user_id=user.id, session=db_session, limit=limit + 1, after=after
+    )
+    if projects is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Something was wrong"
+        )
+    page = pagination.build_page(projects, limit, pagination.created_key)
+    adapter = serializers.project_page_adapter
+    if with_counts:
+        counts = await project_queries.get_task_counts(
+            user.id, [project["id"] for project in page["items"]], db_session
+        )
+        for project in page["items"]:
+            project["task_counts"] = counts.get(project["id"], {})
+        adapter = serializers.project_counts_page_adapter
+    response = serializers.json_response(adapter, page)
+    etags.set_headers(response, etag)
+    return response
 
 
 @app.get(
@@ -182,15 +292,20 @@ async def get_projects_api(
 )
 async def get_project_api(
     project_id: int,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
-    db_session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(auth_tools.get_read_session),
 ):
-    print(project_id, user.id)
     project = await project_queries.get_project(
         project_id=project_id, user_id=user.id, session=db_session
     )
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    etag = etags.resource_etag("p", project.id, project.change_seq)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    etags.set_headers(response, etag)
     return project
 
 
@@ -202,17 +317,32 @@ async def get_project_api(
 async def update_project_api(
     project_id: int,
     data: project_schemas.ProjectUpdateInSchema,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    request: Request,
+    response: Response,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
     db_session: AsyncSession = Depends(get_session),
 ):
+    expected = etags.expected_change_seq(request, "p", project_id)
     data_dict = data.model_dump(exclude_none=True)
     project = await project_queries.update_project(
-        project_id=project_id, user_id=user.id, data=data_dict, session=db_session
+        project_id=project_id,
+        user_id=user.id,
+        data=data_dict,
+        session=db_session,
+        expected_change_seq=expected,
     )
     if not project:
+        if expected is not None and await project_queries.get_project(
+            project_id=project_id, user_id=user.id, session=db_session
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Precondition failed",
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Something was wrong"
         )
+    etags.set_headers(response, etags.resource_etag("p", project.id, project.change_seq))
     return project
 
 
@@ -223,7 +353,7 @@ async def update_project_api(
 )
 async def delete_project_api(
     project_id: int,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
     db_session: AsyncSession = Depends(get_session),
 ):
     await project_queries.delete_project(
@@ -243,7 +373,7 @@ async def delete_project_api(
 async def create_task_api(
     project_id: int,
     data: project_schemas.TaskInSchema,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
     db_session: AsyncSession = Depends(get_session),
 ):
     project = await project_queries.get_project(
@@ -264,18 +394,49 @@ async def create_task_api(
 
 @app.get(
     "/projects/{project_id:int}/tasks",
-    response_model=List[project_schemas.TaskOutSchema],
+    response_model=project_schemas.TaskPageOutSchema,
     tags=["tasks"],
 )
 async def get_tasks_api(
     project_id: int,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
-    db_session: AsyncSession = Depends(get_session),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    task_status: Optional[project_schemas.TaskStatus] = Query(None, alias="status"),
+    updated_since: Optional[datetime] = None,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(auth_tools.get_read_session),
 ):
-    tasks = await project_queries.get_tasks(
-        user_id=user.id, project_id=project_id, session=db_session
+    limit = pagination.clamp_limit(limit)
+    try:
+        before = pagination.decode_created_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    change_seq = await user_queries.get_user_change_seq(user.id, db_session)
+    etag = etags.collection_etag(user.id, change_seq, request)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    tasks = await project_queries.get_task_rows(
+        user_id=user.id,
+        project_id=project_id,
+        session=db_session,
+        limit=limit + 1,
+        before=before,
+        status=task_status.value if task_status else None,
+        updated_since=pagination.naive_utc(updated_since) if updated_since else None,
+    )
+    if tasks is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Something was wrong"
+        )
+    response = serializers.json_response(
+        serializers.task_page_adapter,
+        pagination.build_page(tasks, limit, pagination.created_key),
     )
-    return tasks
+    etags.set_headers(response, etag)
+    return response
 
 
 @app.get(
@@ -286,17 +447,62 @@ async def get_tasks_api(
 async def get_task_api(
     project_id: int,
     task_id: int,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
-    db_session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(auth_tools.get_read_session),
 ):
     task = await project_queries.get_task(
         task_id=task_id, project_id=project_id, user_id=user.id, session=db_session
     )
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    etag = etags.resource_etag("t", task.id, task.change_seq)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    etags.set_headers(response, etag)
     return task
 
 
+@app.get(
+    "/tasks/search",
+    response_model=project_schemas.TaskPageOutSchema,
+    tags=["tasks"],
+)
+async def search_tasks_api(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(auth_tools.get_read_session),
+):
+    limit = pagination.clamp_limit(limit)
+    try:
+        after = pagination.decode_rank_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    change_seq = await user_queries.get_user_change_seq(user.id, db_session)
+    etag = etags.collection_etag(user.id, change_seq, request)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    tasks = await project_queries.search_tasks(
+        user_id=user.id, query=q, session=db_session, limit=limit + 1, after=after
+    )
+    if tasks is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Something was wrong"
+        )
+    response = serializers.json_response(
+        serializers.task_page_adapter,
+        pagination.build_page(tasks, limit, pagination.rank_key),
+    )
+    etags.set_headers(response, etag)
+    return response
+
+
 @app.put(
     "/projects/{project_id:int}/tasks/{task_id:int}",
     response_model=project_schemas.TaskOutSchema,
@@ -306,9 +512,12 @@ async def update_task_api(
     project_id: int,
     task_id: int,
     data: project_schemas.TaskUpdateInSchema,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    request: Request,
+    response: Response,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
     db_session: AsyncSession = Depends(get_session),
 ):
+    expected = etags.expected_change_seq(request, "t", task_id)
     data_dict = data.model_dump(exclude_none=True)
     task = await project_queries.update_task(
         task_id=task_id,
@@ -316,11 +525,20 @@ async def update_task_api(
         user_id=user.id,
         data=data_dict,
         session=db_session,
+        expected_change_seq=expected,
     )
     if not task:
+        if expected is not None and await project_queries.get_task(
+            task_id=task_id, project_id=project_id, user_id=user.id, session=db_session
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Precondition failed",
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Something was wrong"
         )
+    etags.set_headers(response, etags.resource_etag("t", task.id, task.change_seq))
     return task
 
 
@@ -332,10 +550,292 @@ async def update_task_api(
 async def delete_task_api(
     project_id: int,
     task_id: int,
-    user: user_models.User = Depends(auth_tools.get_current_active_user),
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
     db_session: AsyncSession = Depends(get_session),
 ):
     await project_queries.delete_task(
         task_id=task_id, project_id=project_id, user_id=user.id, session=db_session
     )
     return {"message": "Success"}
+
+
+@app.post(
+    "/projects/{project_id:int}/tasks:batch",
+    response_model=project_schemas.TaskBatchOutSchema,
+    tags=["tasks"],
+)
+async def batch_tasks_api(
+    project_id: int,
+    data: project_schemas.TaskBatchInSchema,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(get_session),
+):
+    operations = data.operations
+    if len(operations) > config.TASK_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many operations, max {config.TASK_BATCH_MAX_OPERATIONS}",
+        )
+    ids = [item.id for item in operations if item.id is not None]
+    if len(ids) != len(set(ids)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each task id may appear only once per batch",
+        )
+    project = await project_queries.get_project(
+        project_id=project_id, user_id=user.id, session=db_session
+    )
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    creates, updates, deletes = [], [], []
+    for item in operations:
+        fields = {
+            "name": item.name,
+            "description": item.description,
+            "status": item.status.value if item.status else None,
+        }
+        if item.op == project_schemas.TaskBatchOperation.create:
+            fields["description"] = fields["description"] or ""
+            fields["status"] = fields["status"] or project_schemas.TaskStatus.new.value
+            creates.append(fields)
+        elif item.op == project_schemas.TaskBatchOperation.update:
+            updates.append({"id": item.id, **fields})
+        else:
+            deletes.append(item.id)
+
+    result = await project_queries.batch_tasks(
+        project_id=project_id,
+        user_id=user.id,
+        creates=creates,
+        updates=updates,
+        deletes=deletes,
+        session=db_session,
+    )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Something was wrong"
+        )
+    created, updated, deleted = result
+    created = iter(created)
+    updated = {task["id"]: task for task in updated}
+    deleted = set(deleted)
+
+    results = []
+    for index, item in enumerate(operations):
+        if item.op == project_schemas.TaskBatchOperation.create:
+            task = next(created)
+            results.append(
+                {"index": index, "op": item.op, "ok": True, "task_id": task["id"], "task": task}
+            )
+        elif item.op == project_schemas.TaskBatchOperation.update:
+            task = updated.get(item.id)
+            results.append(
+                {
+                    "index": index,
+                    "op": item.op,
+                    "ok": task is not None,
+                    "task_id": item.id,
+                    "task": task,
+                    "detail": None if task else "Not found",
+                }
+            )
+        else:
+            ok = item.id in deleted
+            results.append(
+                {
+                    "index": index,
+                    "op": item.op,
+                    "ok": ok,
+                    "task_id": item.id,
+                    "detail": None if ok else "Not found",
+                }
+            )
+    return {"results": results}
+
+
+# ================================Sync=================================
+
+
+@app.get("/sync", response_model=project_schemas.SyncOutSchema, tags=["sync"])
+async def sync_api(
+    since: Optional[str] = None,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(auth_tools.get_read_session),
+):
+    """Projects and tasks changed since `since` (a previous `next_token`);
+    without it, everything. Deleted rows are listed in `deleted`; a deleted
+    project implies all of its tasks are gone."""
+    try:
+        since_seq = pagination.decode_change_token(since) if since else 0
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token"
+        )
+    until_seq = await user_queries.get_user_change_seq(user.id, db_session)
+    if since_seq > until_seq:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token"
+        )
+    projects, tasks, tombstones = await project_queries.get_changes(
+        user_id=user.id, since=since_seq, until=until_seq, session=db_session
+    )
+    return serializers.json_response(
+        serializers.sync_adapter,
+        {
+            "projects": projects,
+            "tasks": tasks,
+            "deleted": [
+                {"entity": t.entity, "id": t.entity_id, "project_id": t.project_id}
+                for t in tombstones
+            ],
+            "next_token": pagination.encode_cursor([until_seq]),
+        },
+    )
+
+
+# ================================Export/Import=================================
+
+
+@app.get("/export", tags=["export"])
+async def export_api(
+    export_format: project_schemas.ExportFormat = Query(
+        project_schemas.ExportFormat.ndjson, alias="format"
+    ),
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+):
+    """Everything the user owns, streamed. `ndjson`: one project/task object
+    per line, the format POST /import takes; `csv`: tasks only, with their
+    project name."""
+    if export_format == project_schemas.ExportFormat.csv:
+        return StreamingResponse(
+            transfer.export_csv(user.id),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="tasks.csv"'},
+        )
+    return StreamingResponse(
+        transfer.export_ndjson(user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="tasks.ndjson"'},
+    )
+
+
+@app.post("/import", tags=["export"])
+async def import_api(
+    request: Request,
+    user: user_schemas.UserSchema = Depends(auth_tools.get_current_active_user),
+    db_session: AsyncSession = Depends(get_session),
+):
+    """Imports an NDJSON export sent as the raw request body. Responds with
+    NDJSON progress lines while loading; the last one is either
+    {"done": true, ...} or {"error": ...} (then nothing was imported). The
+    status code is 200 either way, since it is sent before loading starts."""
+    # the auth lookup's connection goes back to the pool while the body uploads
+    await db_session.commit()
+    upload = await transfer.spool(request)
+    return StreamingResponse(
+        transfer.import_ndjson(user.id, upload),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.websocket("/ws")
+async def events_ws(websocket: WebSocket, token: str):
+    """Pushes the user's project/task change events as JSON text frames.
+
+    Browsers cannot set headers on a WebSocket, so the access token goes in
+    the query string. A {"type": "resync"} event means events may have been
+    lost and the client should call /sync.
+    """
+    # short-lived session: don't hold a pool connection for the socket's lifetime
+    async with database.async_session_maker() as db_session:
+        try:
+            auth_session = await auth_tools.get_current_auth_session(token, db_session)
+        except HTTPException:
+            auth_session = None
+    if not auth_session or not auth_session.user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    async def wait_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    disconnected = asyncio.ensure_future(wait_disconnect())
+    try:
+        async with events.broker.subscribe(auth_session.user.id) as queue:
+            while True:
+                next_event = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    {next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected.done():
+                    next_event.cancel()
+                    break
+                await websocket.send_text(next_event.result())
+    finally:
+        disconnected.cancel()
+
+
+# ================================Internal=================================
+
+
+@app.get(
+    "/internal/hasher",
+    response_model=dict,
+    tags=["internal"],
+    dependencies=[Depends(auth_tools.verify_internal_access)],
+)
+async def hasher_stats_api():
+    return auth_tools.password_hasher_stats()
+
+
+@app.get(
+    "/internal/pool",
+    response_model=dict,
+    tags=["internal"],
+    dependencies=[Depends(auth_tools.verify_internal_access)],
+)
+async def pool_stats_api():
+    return database.pool_status()
+
+
+@app.get(
+    "/internal/admission",
+    response_model=dict,
+    tags=["internal"],
+    dependencies=[Depends(auth_tools.verify_internal_access)],
+)
+async def admission_stats_api():
+    return admission.admission_stats()
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    tags=["internal"],
+    dependencies=[Depends(auth_tools.verify_internal_access)],
+)
+async def metrics_api():
+    pool = database.pool_status()
+    hasher = auth_tools.password_hasher_stats()
+    admitted = admission.admission_stats()
+    return instrumentation.render_metrics(
+        {
+            "db_pool_size": pool["size"],
+            "db_pool_checked_out": pool["checked_out"],
+            "db_pool_overflow": pool["overflow"],
+            "db_pool_checkouts": pool["checkouts"],
+            "db_pool_wait_seconds": pool["wait_seconds"],
+            "db_pool_max_wait_seconds": pool["max_wait_seconds"],
+            "password_hash_in_flight": hasher["in_flight"],
+            "password_hash_queue_depth": hasher["queue_depth"],
+            "password_hash_rejected": hasher["rejected"],
+            "admission_limit": admitted["limit"],
+            "admission_in_flight": admitted["in_flight"],
+            "admission_rejected_critical": admitted["rejected_critical"],
+            "admission_rejected_normal": admitted["rejected_normal"],
+            "admission_rejected_bulk": admitted["rejected_bulk"],
+        }
+    )
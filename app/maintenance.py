@@ -0,0 +1,119 @@
+import asyncio
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from app import config
+from app.database import async_session_maker, engine
+from app.queries import project as project_queries
+from app.queries import user as user_queries
+
+# pg advisory lock keys, so only one worker runs a job at a time
+AUTH_REAPER_LOCK = 7_310_001
+PROJECT_PURGE_LOCK = 7_310_002
+
+# for DDL that cannot run inside a transaction block
+autocommit_session_maker = async_sessionmaker(
+    engine.execution_options(isolation_level="AUTOCOMMIT"), expire_on_commit=False
+)
+
+
+async def _try_lock(key: int, session: AsyncSession) -> bool:
+    """Transaction-scoped; released on commit/rollback."""
+    result = await session.execute(select(func.pg_try_advisory_xact_lock(key)))
+    return bool(result.scalar())
+
+
+async def _ensure_auth_session_partitions():
+    async with async_session_maker() as session:
+        if not await _try_lock(AUTH_REAPER_LOCK, session):
+            return
+        await user_queries.ensure_auth_session_partitions(
+            config.AUTH_SESSION_PARTITIONS_AHEAD, session
+        )
+        await session.commit()
+
+
+async def _drop_expired_auth_session_partitions():
+    # autocommit, so the lock is session-level and released explicitly
+    async with autocommit_session_maker() as session:
+        locked = await session.execute(select(func.pg_try_advisory_lock(AUTH_REAPER_LOCK)))
+        if not locked.scalar():
+            return
+        try:
+            await user_queries.drop_expired_auth_session_partitions(session)
+        finally:
+            await session.execute(select(func.pg_advisory_unlock(AUTH_REAPER_LOCK)))
+
+
+async def _delete_expired(delete_batch) -> int:
+    deleted = 0
+    while True:
+        async with async_session_maker() as session:
+            if not await _try_lock(AUTH_REAPER_LOCK, session):
+                return deleted
+            count = await delete_batch(config.AUTH_REAPER_BATCH_SIZE, session)
+            await session.commit()
+        deleted += count
+        if count < config.AUTH_REAPER_BATCH_SIZE:
+            return deleted
+        await asyncio.sleep(0)  # let requests run between batches
+
+
+async def reap_auth_sessions() -> int:
+    """Keeps auth_sessions partitions ahead of time, drops fully expired
+    partitions and deletes leftover expired rows in bounded batches. Each
+    step runs even when an earlier one failed."""
+    try:
+        await _ensure_auth_session_partitions()
+    except Exception as e:
+        print(f"Error creating auth session partitions - {e}")
+    try:
+        await _drop_expired_auth_session_partitions()
+    except Exception as e:
+        print(f"Error dropping auth session partitions - {e}")
+    deleted = 0
+    for delete_batch in (
+        user_queries.delete_expired_auth_sessions,
+        user_queries.delete_expired_revoked_auth_sessions,
+    ):
+        try:
+            deleted += await _delete_expired(delete_batch)
+        except Exception as e:
+            print(f"Error deleting expired auth sessions - {e}")
+    return deleted
+
+
+async def run_auth_session_reaper():
+    while True:
+        try:
+            await reap_auth_sessions()
+        except Exception as e:
+            print(f"Error reaping auth sessions - {e}")
+        await asyncio.sleep(config.AUTH_REAPER_INTERVAL_SECONDS)
+
+
+async def purge_deleted_projects() -> int:
+    """Deletes the tasks of soft-deleted projects in bounded batches, one
+    transaction per batch, then the projects themselves."""
+    deleted = 0
+    while True:
+        async with async_session_maker() as session:
+            if not await _try_lock(PROJECT_PURGE_LOCK, session):
+                return deleted
+            project = await project_queries.get_deleted_project(session)
+            if project is None:
+                return deleted
+            deleted += await project_queries.purge_deleted_project(
+                project.id, project.user_id, config.PROJECT_PURGE_BATCH_SIZE, session
+            )
+            await session.commit()
+        await asyncio.sleep(0)  # let requests run between batches
+
+
+async def run_project_purger():
+    while True:
+        try:
+            await purge_deleted_projects()
+        except Exception as e:
+            print(f"Error purging deleted projects - {e}")
+        await asyncio.sleep(config.PROJECT_PURGE_INTERVAL_SECONDS)
@@ -1,5 +1,7 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey, DateTime
+from typing import List
+from sqlalchemy import ForeignKey, DateTime, Index, BigInteger, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
@@ -12,11 +14,14 @@ class Project(Base):
     name: Mapped[str] = mapped_column(nullable=False)
     is_active: Mapped[bool] = mapped_column(default=False)
     is_default: Mapped[bool] = mapped_column(default=False)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(), server_default=func.now())
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    # set when a large project is deleted; its tasks are purged in the background
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(), nullable=True)
 
-    user: Mapped["User"] = relationship(back_populates="projects", lazy="selectin")
-    tasks: Mapped["Task"] = relationship(back_populates="project", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="projects", lazy="raise")
+    tasks: Mapped[List["Task"]] = relationship(back_populates="project", lazy="raise")
 
 
 class Task(Base):
@@ -30,8 +35,59 @@ class Task(Base):
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"))
     created_at: Mapped[datetime] = mapped_column(DateTime(), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(), nullable=True, server_onupdate=func.now()
+        DateTime(), nullable=True, onupdate=func.now(), server_onupdate=func.now()
+    )
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    # 'simple': no stemming or stop words, names are often not English
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))",
+            persisted=True,
+        ),
+        deferred=True,
     )
 
-    user: Mapped["User"] = relationship(back_populates="tasks", lazy="selectin")
-    project: Mapped["Project"] = relationship(back_populates="tasks", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="tasks", lazy="raise")
+    project: Mapped["Project"] = relationship(back_populates="tasks", lazy="raise")
+
+
+class Tombstone(Base):
+    """Deleted project/task, kept so /sync can report the deletion."""
+
+    __tablename__ = "tombstones"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    entity: Mapped[str] = mapped_column(nullable=False)  # "project" | "task"
+    entity_id: Mapped[int] = mapped_column(nullable=False)
+    project_id: Mapped[int] = mapped_column(nullable=True)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(), server_default=func.now())
+
+
+# get_tasks / get_task / delete_tasks: WHERE user_id, project_id ORDER BY created_at DESC
+Index(
+    "ix_tasks_user_id_project_id_created_at",
+    Task.user_id,
+    Task.project_id,
+    Task.created_at.desc(),
+)
+
+# /sync: WHERE user_id = ? AND change_seq > ?
+Index("ix_projects_user_id_change_seq", Project.user_id, Project.change_seq)
+# purge_deleted_projects: the (usually empty) set of soft-deleted projects
+Index(
+    "ix_projects_deleted_at",
+    Project.deleted_at,
+    postgresql_where=Project.deleted_at.isnot(None),
+)
+Index("ix_tasks_user_id_change_seq", Task.user_id, Task.change_seq)
+Index("ix_tombstones_user_id_change_seq", Tombstone.user_id, Tombstone.change_seq)
+# search_tasks: WHERE user_id = ? AND search_vector @@ query (btree_gin for user_id)
+Index(
+    "ix_tasks_user_id_search_vector",
+    Task.user_id,
+    Task.search_vector,
+    postgresql_using="gin",
+)
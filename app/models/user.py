@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey, DateTime
+from typing import List
+from sqlalchemy import ForeignKey, DateTime, BigInteger, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
@@ -14,45 +15,65 @@ class User(Base):
     full_name: Mapped[str] = mapped_column(nullable=True)
     is_active: Mapped[bool] = mapped_column(default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(), server_default=func.now())
+    # last issued change sequence for this user's projects/tasks (see /sync)
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
 
-    settings: Mapped["UserSetting"] = relationship(
-        back_populates="user", lazy="selectin"
-    )
+    settings: Mapped["UserSetting"] = relationship(back_populates="user", lazy="raise")
     subscription: Mapped["UserSubscription"] = relationship(
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise"
+    )
+    auth_session: Mapped[List["AuthSession"]] = relationship(
+        back_populates="user", lazy="raise"
     )
-    auth_session: Mapped["AuthSession"] = relationship(back_populates="user")
-    projects: Mapped["Project"] = relationship(back_populates="user")
-    tasks: Mapped["Task"] = relationship(back_populates="user", lazy="selectin")
+    projects: Mapped[List["Project"]] = relationship(back_populates="user", lazy="raise")
+    tasks: Mapped[List["Task"]] = relationship(back_populates="user", lazy="raise")
 
 
 class AuthSession(Base):
+    """Range-partitioned by month of expired_at (auth_sessions_pYYYYMM), so
+    expired sessions are dropped a partition at a time; the partition key has
+    to be part of every unique index."""
+
     __tablename__ = "auth_sessions"
+    __table_args__ = (
+        Index("ix_auth_sessions_token", "token", "expired_at", unique=True),
+        {"postgresql_partition_by": "RANGE (expired_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     token: Mapped[str] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(DateTime(), server_default=func.now())
-    expired_at: Mapped[datetime] = mapped_column(DateTime())
+    expired_at: Mapped[datetime] = mapped_column(DateTime(), primary_key=True)
+
+    user: Mapped["User"] = relationship(back_populates="auth_session", lazy="raise")
 
-    user: Mapped["User"] = relationship(back_populates="auth_session", lazy="selectin")
+
+class RevokedAuthSession(Base):
+    """Logged out sessions, for stateless token verification (AUTH_STATELESS)."""
+
+    __tablename__ = "revoked_auth_sessions"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    session_id: Mapped[int] = mapped_column(nullable=False)
+    expired_at: Mapped[datetime] = mapped_column(DateTime(), index=True)
 
 
 class UserSetting(Base):
     __tablename__ = "users_setting"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
 
-    user: Mapped["User"] = relationship(back_populates="settings")
+    user: Mapped["User"] = relationship(back_populates="settings", lazy="raise")
 
 
 class UserSubscription(Base):
     __tablename__ = "users_subscription"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     active_subscription: Mapped[bool] = mapped_column(default=False)
     cancel_subscription_at_period_end: Mapped[bool] = mapped_column(default=False)
 
-    user: Mapped["User"] = relationship(back_populates="subscription")
+    user: Mapped["User"] = relationship(back_populates="subscription", lazy="raise")
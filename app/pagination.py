@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from app import config
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque keyset cursor: urlsafe base64 of the JSON list of sort-key values."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Timestamp columns are naive UTC (server-side now()); asyncpg refuses to
+    compare them with an aware value such as ?updated_since=...Z."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def decode_created_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Cursor over (created_at, id)."""
+    values = decode_cursor(cursor)
+    try:
+        created_at, row_id = values
+        return naive_utc(datetime.fromisoformat(created_at)), int(row_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    """Search cursor over (rank, id)."""
+    values = decode_cursor(cursor)
+    try:
+        rank, row_id = values
+        return float(rank), int(row_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def decode_change_token(token: str) -> int:
+    """/sync token over the per-user change sequence."""
+    values = decode_cursor(token)
+    try:
+        (change_seq,) = values
+        return int(change_seq)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid token")
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return config.PAGE_SIZE_DEFAULT
+    return min(limit, config.PAGE_SIZE_MAX)
+
+
+def build_page(
+    rows: List[Any], limit: int, key: Callable[[Any], Sequence[Any]]
+) -> dict:
+    """`rows` is fetched with limit + 1 so we know whether another page exists."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return {"items": rows, "next_cursor": encode_cursor(key(rows[-1]))}
+    return {"items": rows, "next_cursor": None}
+
+
+def created_key(item: dict) -> Tuple[datetime, int]:
+    return item["created_at"], item["id"]
+
+
+def rank_key(item: dict) -> Tuple[float, int]:
+    return item["rank"], item["id"]
@@ -1,33 +1,250 @@
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from app.models.project import Project, Task
-from typing_extensions import List
-from sqlalchemy import select, insert, update, delete
+from app.models.project import Project, Task, Tombstone
+from app.models.user import User
+from app import config, events
+from datetime import datetime
+from typing_extensions import Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, update, delete, func, tuple_
+from sqlalchemy import Integer, Result, Row, Select, String, column, values
+from sqlalchemy.orm import load_only
+
+# columns needed by ProjectOutSchema / TaskOutSchema, plus change_seq for ETags
+PROJECT_OUT_LOAD = load_only(
+    Project.id,
+    Project.name,
+    Project.is_active,
+    Project.is_default,
+    Project.created_at,
+    Project.change_seq,
+)
+TASK_OUT_LOAD = load_only(
+    Task.id,
+    Task.name,
+    Task.description,
+    Task.status,
+    Task.project_id,
+    Task.created_at,
+    Task.updated_at,
+    Task.change_seq,
+)
+# the same columns for read-only Core selects: no identity map, no instance
+# state, no loader options. Rows are handed out as plain dicts, which pydantic
+# validates several times faster than attribute access on Row/ORM objects.
+PROJECT_OUT_COLUMNS = (
+    Project.id, Project.name, Project.is_active, Project.is_default, Project.created_at
+)
+TASK_OUT_COLUMNS = (
+    Task.id,
+    Task.name,
+    Task.description,
+    Task.status,
+    Task.project_id,
+    Task.created_at,
+    Task.updated_at,
+)
+
+
+def _project_is_live(project_id: int):
+    """Soft-deleted projects are gone for every reader; their tasks just
+    haven't been purged yet."""
+    return (
+        select(Project.id)
+        .where(Project.id == project_id, Project.deleted_at.is_(None))
+        .exists()
+    )
+
+
+def _task_in_live_project(user_id: int):
+    """_project_is_live for queries across projects."""
+    return Task.project_id.not_in(
+        select(Project.id).where(
+            Project.user_id == user_id, Project.deleted_at.isnot(None)
+        )
+    )
+
+
+async def next_change_seq(user_id: int, session: AsyncSession) -> int:
+    """Issues the next per-user change sequence number.
+
+    The row lock on users serializes a user's writers until commit, so a reader
+    that sees users.change_seq == N also sees every row stamped <= N.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(change_seq=User.change_seq + 1)
+        .returning(User.change_seq)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+async def release_change_seq(user_id: int, session: AsyncSession):
+    """Hands back a number from next_change_seq that ended up unused, so a
+    no-op write doesn't invalidate the user's ETags. Nobody can have taken a
+    later one: the users row stays locked until the request commits."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(change_seq=User.change_seq - 1)
+    )
+    await session.execute(stmt)
+
+
+async def add_tombstones(
+    user_id: int,
+    entity: str,
+    rows: List[Tuple[int, Optional[int]]],
+    change_seq: int,
+    session: AsyncSession,
+):
+    """rows: (entity_id, project_id)"""
+    if not rows:
+        return
+    await session.execute(
+        insert(Tombstone),
+        [
+            {
+                "user_id": user_id,
+                "entity": entity,
+                "entity_id": entity_id,
+                "project_id": project_id,
+                "change_seq": change_seq,
+            }
+            for entity_id, project_id in rows
+        ],
+    )
 
 
 async def create_project(data: dict, session: AsyncSession) -> Project:
     try:
-        stmt = insert(Project).values(**data).returning(Project)
+        change_seq = await next_change_seq(data["user_id"], session)
+        stmt = insert(Project).values(**data, change_seq=change_seq).returning(Project)
         result = await session.execute(stmt)
-        await session.commit()
-        return result.scalars().first()
+        project = result.scalars().first()
+        await events.publish(
+            session,
+            project.user_id,
+            "project.created",
+            {"id": project.id, "change_seq": change_seq},
+        )
+        return project
     except Exception as e:
         print(f"Error create project - {data}")
 
 
-async def get_projects(user_id: int, session: AsyncSession) -> List[Project]:
+async def get_projects(
+    user_id: int,
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Project]:
+    """Oldest first, keyset-paginated on (created_at, id)."""
     try:
-        stmt = select(Project).where(Project.user_id == user_id)
+        stmt = _projects_stmt(
+            select(Project).options(PROJECT_OUT_LOAD), user_id, limit, after
+        )
         result = await session.execute(stmt)
         return result.scalars().all()
     except Exception as e:
         print(f"Error getting projects - {user_id}")
 
 
+async def get_project_rows(
+    user_id: int,
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[dict]:
+    """get_projects for read-only callers: ProjectOutSchema columns as dicts."""
+    try:
+        stmt = _projects_stmt(select(*PROJECT_OUT_COLUMNS), user_id, limit, after)
+        return _as_dicts(await session.execute(stmt))
+    except Exception as e:
+        print(f"Error getting projects - {user_id}")
+
+
+async def get_task_counts(
+    user_id: int, project_ids: List[int], session: AsyncSession
+) -> Dict[int, Dict[str, int]]:
+    """{project_id: {status: count}} in one grouped aggregate over the
+    (user_id, project_id, ...) index; projects without tasks are absent."""
+    counts = {}
+    if not project_ids:
+        return counts
+    try:
+        stmt = (
+            select(Task.project_id, Task.status, func.count())
+            .where(Task.user_id == user_id, Task.project_id.in_(project_ids))
+            .group_by(Task.project_id, Task.status)
+        )
+        for project_id, status, count in await session.execute(stmt):
+            counts.setdefault(project_id, {})[status] = count
+        return counts
+    except Exception as e:
+        print(f"Error counting tasks - {user_id}")
+        return counts
+
+
+async def search_tasks(
+    user_id: int,
+    query: str,
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[float, int]] = None,
+) -> List[dict]:
+    """Best match first, keyset-paginated on (rank, id). `query` uses web search
+    syntax: words, "quoted phrases", OR, -excluded."""
+    try:
+        tsquery = func.websearch_to_tsquery("simple", query)
+        rank = func.ts_rank(Task.search_vector, tsquery)
+        stmt = (
+            select(*TASK_OUT_COLUMNS, rank.label("rank"))
+            .where(
+                Task.user_id == user_id,
+                Task.search_vector.bool_op("@@")(tsquery),
+                _task_in_live_project(user_id),
+            )
+            .order_by(rank.desc(), Task.id.desc())
+        )
+        if after:
+            stmt = stmt.where(tuple_(rank, Task.id) < after)
+        if limit:
+            stmt = stmt.limit(limit)
+        return _as_dicts(await session.execute(stmt))
+    except Exception as e:
+        print(f"Error searching Tasks - {user_id}")
+
+
+def _as_dicts(result: Result) -> List[dict]:
+    return [dict(row) for row in result.mappings()]
+
+
+def _projects_stmt(
+    stmt: Select, user_id: int, limit: Optional[int], after: Optional[Tuple[datetime, int]]
+) -> Select:
+    stmt = stmt.where(
+        Project.user_id == user_id, Project.deleted_at.is_(None)
+    ).order_by(
+        Project.created_at, Project.id
+    )
+    if after:
+        stmt = stmt.where(tuple_(Project.created_at, Project.id) > after)
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
 async def get_project(project_id: int, user_id: int, session: AsyncSession) -> Project:
     try:
-        print(project_id, user_id)
-        stmt = select(Project).where(
-            Project.user_id == user_id, Project.id == project_id
+        stmt = (
+            select(Project)
+            .options(PROJECT_OUT_LOAD)
+            .where(
+                Project.user_id == user_id,
+                Project.id == project_id,
+                Project.deleted_at.is_(None),
+            )
         )
         result = await session.execute(stmt)
         return result.scalars().first()
@@ -36,32 +253,118 @@ async def get_project(project_id: int, user_id: int, session: AsyncSession) -> P
 
 
 async def delete_project(project_id: int, user_id: int, session: AsyncSession) -> bool:
+    """Deletes the project and its tasks in one transaction. A project with
+    more than PROJECT_DELETE_SYNC_MAX_TASKS tasks is only marked deleted and
+    left to purge_deleted_project, so the call takes the same time whatever
+    the project size. Either way readers stop seeing it on commit."""
     try:
-        await delete_tasks(project_id, user_id, session)
-        stmt = delete(Project).where(
-            Project.user_id == user_id, Project.id == project_id, Project.is_default == False
+        stmt = (
+            select(Project.id)
+            .where(
+                Project.user_id == user_id,
+                Project.id == project_id,
+                Project.is_default == False,
+                Project.deleted_at.is_(None),
+            )
+            .with_for_update()
         )
-        result = await session.execute(stmt)
-        await session.commit()
-        return bool(result.rowcount)
+        if not (await session.execute(stmt)).scalar():
+            return False
+        probe = (
+            select(Task.id)
+            .where(Task.user_id == user_id, Task.project_id == project_id)
+            .limit(config.PROJECT_DELETE_SYNC_MAX_TASKS + 1)
+            .subquery()
+        )
+        task_count = (await session.execute(select(func.count()).select_from(probe))).scalar()
+        change_seq = await next_change_seq(user_id, session)
+        if task_count > config.PROJECT_DELETE_SYNC_MAX_TASKS:
+            await session.execute(
+                update(Project)
+                .where(Project.id == project_id)
+                .values(deleted_at=func.now())
+            )
+        else:
+            await delete_tasks(project_id, user_id, session)
+            await session.execute(delete(Project).where(Project.id == project_id))
+        # a project tombstone also stands for all of its tasks
+        await add_tombstones(
+            user_id, "project", [(project_id, project_id)], change_seq, session
+        )
+        await events.publish(
+            session,
+            user_id,
+            "project.deleted",
+            {"id": project_id, "change_seq": change_seq},
+        )
+        return True
     except Exception as e:
         print(f"Error deleting project - user:{user_id} project:{project_id}")
         return False
 
 
+async def get_deleted_project(session: AsyncSession) -> Optional[Row]:
+    """(id, user_id) of the longest soft-deleted project waiting for purge."""
+    stmt = (
+        select(Project.id, Project.user_id)
+        .where(Project.deleted_at.isnot(None))
+        .order_by(Project.deleted_at)
+        .limit(1)
+    )
+    return (await session.execute(stmt)).first()
+
+
+async def purge_deleted_project(
+    project_id: int, user_id: int, limit: int, session: AsyncSession
+) -> int:
+    """Deletes up to `limit` tasks of a soft-deleted project and the project
+    row once none are left. Returns the number of tasks deleted; the caller
+    owns the transaction."""
+    count = await delete_tasks(project_id, user_id, session, limit=limit)
+    if count < limit:
+        await session.execute(
+            delete(Project).where(
+                Project.id == project_id, Project.deleted_at.isnot(None)
+            )
+        )
+    return count
+
+
 async def update_project(
-    project_id: int, user_id: int, data: dict, session: AsyncSession
+    project_id: int,
+    user_id: int,
+    data: dict,
+    session: AsyncSession,
+    expected_change_seq: Optional[int] = None,
 ) -> Project:
+    """expected_change_seq: only update while the row is still at that
+    version (If-Match); returns None when the row is missing or has moved on."""
     try:
+        change_seq = await next_change_seq(user_id, session)
         stmt = (
             update(Project)
-            .values(**data)
-            .where(Project.user_id == user_id, Project.id == project_id)
+            .values(**data, change_seq=change_seq)
+            .where(
+                Project.user_id == user_id,
+                Project.id == project_id,
+                Project.deleted_at.is_(None),
+            )
             .returning(Project)
         )
+        if expected_change_seq is not None:
+            stmt = stmt.where(Project.change_seq == expected_change_seq)
         result = await session.execute(stmt)
-        await session.commit()
-        return result.scalars().first()
+        project = result.scalars().first()
+        if not project:
+            await release_change_seq(user_id, session)
+            return None
+        await events.publish(
+            session,
+            user_id,
+            "project.updated",
+            {"id": project.id, "change_seq": change_seq},
+        )
+        return project
     except Exception as e:
         print(
             f"Error updating project - user:{user_id} project:{project_id} data:{data}"
@@ -72,33 +375,118 @@ async def update_project(
 # =====
 
 
-async def create_task(data: dict, session: AsyncSession) -> Task:
+async def create_task(data: dict, session: AsyncSession) -> dict:
+    """The new task as TaskOutSchema columns."""
     try:
-        stmt = insert(Task).values(**data).returning(Task)
-        result = await session.execute(stmt)
-        await session.commit()
-        return result.scalars().first()
+        change_seq = await next_change_seq(data["user_id"], session)
+        stmt = (
+            insert(Task)
+            .values(**data, change_seq=change_seq)
+            .returning(*TASK_OUT_COLUMNS)
+        )
+        task = _as_dicts(await session.execute(stmt))[0]
+        await events.publish(
+            session,
+            data["user_id"],
+            "task.created",
+            {"id": task["id"], "project_id": task["project_id"], "change_seq": change_seq},
+        )
+        return task
     except Exception as e:
         print(f"Error create Task - {data}")
 
 
-async def get_tasks(user_id: int, project_id: int, session: AsyncSession) -> List[Task]:
+async def get_tasks(
+    user_id: int,
+    project_id: int,
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> List[Task]:
+    """Newest first, keyset-paginated on (created_at, id)."""
     try:
-        stmt = select(Task).where(
-            Task.user_id == user_id, Task.project_id == project_id
-        ).order_by(Task.created_at.desc())
+        stmt = _tasks_stmt(
+            select(Task).options(TASK_OUT_LOAD),
+            user_id,
+            project_id,
+            limit,
+            before,
+            status,
+            updated_since,
+        )
         result = await session.execute(stmt)
         return result.scalars().all()
     except Exception as e:
         print(f"Error getting Tasks - {user_id}")
 
 
+async def get_task_rows(
+    user_id: int,
+    project_id: int,
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> List[dict]:
+    """get_tasks for read-only callers: TaskOutSchema columns as dicts."""
+    try:
+        stmt = _tasks_stmt(
+            select(*TASK_OUT_COLUMNS),
+            user_id,
+            project_id,
+            limit,
+            before,
+            status,
+            updated_since,
+        )
+        return _as_dicts(await session.execute(stmt))
+    except Exception as e:
+        print(f"Error getting Tasks - {user_id}")
+
+
+def _tasks_stmt(
+    stmt: Select,
+    user_id: int,
+    project_id: int,
+    limit: Optional[int],
+    before: Optional[Tuple[datetime, int]],
+    status: Optional[str],
+    updated_since: Optional[datetime],
+) -> Select:
+    stmt = stmt.where(
+        Task.user_id == user_id,
+        Task.project_id == project_id,
+        _project_is_live(project_id),
+    ).order_by(Task.created_at.desc(), Task.id.desc())
+    if before:
+        stmt = stmt.where(tuple_(Task.created_at, Task.id) < before)
+    if status:
+        stmt = stmt.where(Task.status == status)
+    if updated_since:
+        stmt = stmt.where(
+            func.coalesce(Task.updated_at, Task.created_at) >= updated_since
+        )
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
 async def get_task(
     task_id: int, project_id: int, user_id: int, session: AsyncSession
 ) -> Task:
     try:
-        stmt = select(Task).where(
-            Task.user_id == user_id, Task.id == task_id, Task.project_id == project_id
+        stmt = (
+            select(Task)
+            .options(TASK_OUT_LOAD)
+            .where(
+                Task.user_id == user_id,
+                Task.id == task_id,
+                Task.project_id == project_id,
+                _project_is_live(project_id),
+            )
         )
         result = await session.execute(stmt)
         return result.scalars().first()
@@ -110,47 +498,216 @@ async def delete_task(
     task_id: int, project_id: int, user_id: int, session: AsyncSession
 ) -> bool:
     try:
+        change_seq = await next_change_seq(user_id, session)
         stmt = delete(Task).where(
-            Task.user_id == user_id, Task.id == task_id, Task.project_id == project_id
+            Task.user_id == user_id,
+            Task.id == task_id,
+            Task.project_id == project_id,
+            _project_is_live(project_id),
         )
         result = await session.execute(stmt)
-        await session.commit()
-        return bool(result.rowcount)
+        if not result.rowcount:
+            await release_change_seq(user_id, session)
+            return False
+        await add_tombstones(
+            user_id, "task", [(task_id, project_id)], change_seq, session
+        )
+        await events.publish(
+            session,
+            user_id,
+            "task.deleted",
+            {"id": task_id, "project_id": project_id, "change_seq": change_seq},
+        )
+        return True
     except Exception as e:
         print(f"Error deleting Task - user:{user_id} project:{project_id}")
         return False
 
 
-async def delete_tasks(project_id: int, user_id: int, session: AsyncSession) -> bool:
-    try:
-        stmt = delete(Task).where(
-            Task.user_id == user_id, Task.project_id == project_id
-        )
-        result = await session.execute(stmt)
-        await session.commit()
-        return bool(result.rowcount)
-    except Exception as e:
-        print(f"Error deleting Tasks - user:{user_id} project:{project_id}")
-        return False
+async def delete_tasks(
+    project_id: int, user_id: int, session: AsyncSession, limit: Optional[int] = None
+) -> int:
+    """Deletes the project's tasks, at most `limit` of them. The caller owns
+    the transaction."""
+    condition = (Task.user_id == user_id, Task.project_id == project_id)
+    if limit:
+        batch = select(Task.id).where(*condition).limit(limit).scalar_subquery()
+        stmt = delete(Task).where(Task.id.in_(batch))
+    else:
+        stmt = delete(Task).where(*condition)
+    result = await session.execute(stmt)
+    return result.rowcount
 
 
 async def update_task(
-    task_id: int, project_id: int, user_id: int, data: dict, session: AsyncSession
+    task_id: int,
+    project_id: int,
+    user_id: int,
+    data: dict,
+    session: AsyncSession,
+    expected_change_seq: Optional[int] = None,
 ) -> Task:
+    """expected_change_seq: see update_project."""
     try:
+        change_seq = await next_change_seq(user_id, session)
         stmt = (
             update(Task)
-            .values(**data)
+            .values(**data, change_seq=change_seq)
             .where(
                 Task.user_id == user_id,
                 Task.id == task_id,
                 Task.project_id == project_id,
+                _project_is_live(project_id),
             )
             .returning(Task)
         )
+        if expected_change_seq is not None:
+            stmt = stmt.where(Task.change_seq == expected_change_seq)
         result = await session.execute(stmt)
-        await session.commit()
-        return result.scalars().first()
+        task = result.scalars().first()
+        if not task:
+            await release_change_seq(user_id, session)
+            return None
+        await events.publish(
+            session,
+            user_id,
+            "task.updated",
+            {"id": task.id, "project_id": project_id, "change_seq": change_seq},
+        )
+        return task
     except Exception as e:
         print(f"Error updating Task - user:{user_id} project:{project_id} data:{data}")
         return False
+
+
+async def batch_tasks(
+    project_id: int,
+    user_id: int,
+    creates: List[dict],
+    updates: List[dict],
+    deletes: List[int],
+    session: AsyncSession,
+) -> Optional[Tuple[List[dict], List[dict], List[int]]]:
+    """Applies all operations in one transaction with one statement per kind.
+
+    `creates` rows need name/description/status; `updates` rows need id and
+    name/description/status where None keeps the current value.
+    Returns (created tasks in input order, updated tasks, deleted ids); tasks
+    as TaskOutSchema dicts.
+    """
+    try:
+        created, updated, deleted = [], [], []
+        change_seq = await next_change_seq(user_id, session)
+        if creates:
+            stmt = insert(Task).returning(
+                *TASK_OUT_COLUMNS, sort_by_parameter_order=True
+            )
+            result = await session.execute(
+                stmt,
+                [
+                    {
+                        **row,
+                        "user_id": user_id,
+                        "project_id": project_id,
+                        "change_seq": change_seq,
+                    }
+                    for row in creates
+                ],
+            )
+            created = _as_dicts(result)
+        if updates:
+            batch = values(
+                column("id", Integer),
+                column("name", String),
+                column("description", String),
+                column("status", String),
+                name="batch",
+            ).data(
+                [
+                    (row["id"], row["name"], row["description"], row["status"])
+                    for row in updates
+                ]
+            )
+            stmt = (
+                update(Task)
+                .where(
+                    Task.id == batch.c.id,
+                    Task.user_id == user_id,
+                    Task.project_id == project_id,
+                )
+                .values(
+                    name=func.coalesce(batch.c.name, Task.name),
+                    description=func.coalesce(batch.c.description, Task.description),
+                    status=func.coalesce(batch.c.status, Task.status),
+                    change_seq=change_seq,
+                )
+                .returning(*TASK_OUT_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            updated = _as_dicts(await session.execute(stmt))
+        if deletes:
+            stmt = (
+                delete(Task)
+                .where(
+                    Task.id.in_(deletes),
+                    Task.user_id == user_id,
+                    Task.project_id == project_id,
+                )
+                .returning(Task.id)
+            )
+            result = await session.scalars(stmt)
+            deleted = result.all()
+            await add_tombstones(
+                user_id,
+                "task",
+                [(task_id, project_id) for task_id in deleted],
+                change_seq,
+                session,
+            )
+        # one event for the whole batch; clients pick the rows up via /sync
+        await events.publish(
+            session,
+            user_id,
+            "tasks.batch",
+            {"project_id": project_id, "change_seq": change_seq},
+        )
+        return created, updated, deleted
+    except Exception as e:
+        print(f"Error batch Tasks - user:{user_id} project:{project_id}")
+
+
+async def get_changes(
+    user_id: int, since: int, until: int, session: AsyncSession
+) -> Tuple[List[dict], List[dict], List[Row]]:
+    """Projects, tasks and tombstones stamped with since < change_seq <= until:
+    ProjectOutSchema / TaskOutSchema dicts and (entity, entity_id, project_id) rows."""
+    projects = await session.execute(
+        select(*PROJECT_OUT_COLUMNS)
+        .where(
+            Project.user_id == user_id,
+            Project.change_seq > since,
+            Project.change_seq <= until,
+            Project.deleted_at.is_(None),
+        )
+        .order_by(Project.change_seq)
+    )
+    tasks = await session.execute(
+        select(*TASK_OUT_COLUMNS)
+        .where(
+            Task.user_id == user_id,
+            Task.change_seq > since,
+            Task.change_seq <= until,
+            _task_in_live_project(user_id),
+        )
+        .order_by(Task.change_seq)
+    )
+    tombstones = await session.execute(
+        select(Tombstone.entity, Tombstone.entity_id, Tombstone.project_id)
+        .where(
+            Tombstone.user_id == user_id,
+            Tombstone.change_seq > since,
+            Tombstone.change_seq <= until,
+        )
+        .order_by(Tombstone.change_seq)
+    )
+    return _as_dicts(projects), _as_dicts(tasks), tombstones.all()
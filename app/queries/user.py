@@ -1,13 +1,21 @@
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from app.models.user import User, AuthSession, UserSetting, UserSubscription
-from sqlalchemy import select, insert, update, delete
+from app.models.user import RevokedAuthSession
+from datetime import date, datetime
+from typing_extensions import List
+from sqlalchemy import select, insert, update, delete, func, text, tuple_
+from sqlalchemy.orm import joinedload, load_only
+from app import events
+
+
+# User columns cached in AuthPrincipalSchema (see get_auth_session)
+PRINCIPAL_FIELDS = {"is_active", "email", "full_name"}
 
 
 async def create_auth_session(data: dict, session: AsyncSession) -> AuthSession:
     try:
         stmt = insert(AuthSession).values(**data).returning(AuthSession)
         result = await session.execute(stmt)
-        await session.commit()
         return result.scalars().first()
     except Exception as e:
         print(f"Error create auth session - {data}")
@@ -15,7 +23,23 @@ async def create_auth_session(data: dict, session: AsyncSession) -> AuthSession:
 
 async def get_auth_session(token, session: AsyncSession) -> AuthSession:
     try:
-        stmt = select(AuthSession).where(AuthSession.token == token)
+        # one round trip for everything AuthPrincipalSchema needs
+        stmt = (
+            select(AuthSession)
+            .options(
+                load_only(AuthSession.token, AuthSession.expired_at),
+                joinedload(AuthSession.user)
+                .load_only(User.id, User.full_name, User.email, User.is_active)
+                .options(
+                    joinedload(User.settings).load_only(UserSetting.id),
+                    joinedload(User.subscription).load_only(
+                        UserSubscription.active_subscription,
+                        UserSubscription.cancel_subscription_at_period_end,
+                    ),
+                ),
+            )
+            .where(AuthSession.token == token, AuthSession.expired_at > func.now())
+        )
         result = await session.execute(stmt)
         return result.scalars().first()
     except Exception as e:
@@ -24,24 +48,146 @@ async def get_auth_session(token, session: AsyncSession) -> AuthSession:
 
 async def delete_auth_session(token, session: AsyncSession) -> bool:
     try:
-        stmt = delete(AuthSession).where(AuthSession.token == token)
+        stmt = (
+            delete(AuthSession)
+            .where(AuthSession.token == token)
+            .returning(AuthSession.id, AuthSession.expired_at)
+        )
         result = await session.execute(stmt)
-        return bool(result.rowcount)
+        revoked = [
+            {"session_id": row.id, "expired_at": row.expired_at} for row in result
+        ]
+        if revoked:
+            await session.execute(insert(RevokedAuthSession), revoked)
+        await events.publish_auth_eviction(session, token=token)
+        return bool(revoked)
     except Exception as e:
         print(f"Error deleting auth session - {token}")
         return False
 
 
+async def get_revoked_auth_sessions(
+    after_id: int, session: AsyncSession
+) -> List[RevokedAuthSession]:
+    stmt = (
+        select(RevokedAuthSession)
+        .where(
+            RevokedAuthSession.id > after_id,
+            RevokedAuthSession.expired_at > func.now(),
+        )
+        .order_by(RevokedAuthSession.id)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+# ===== maintenance; callers own the transaction
+
+
+AUTH_SESSION_PARTITION_PREFIX = "auth_sessions_p"
+
+
+def _month_start(day: date, months: int = 0) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_auth_session_partitions(months_ahead: int, session: AsyncSession):
+    """Monthly partitions from the current month through `months_ahead`."""
+    today = date.today()
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        name = f"{AUTH_SESSION_PARTITION_PREFIX}{start:%Y%m}"
+        await session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF auth_sessions "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+
+
+async def drop_expired_auth_session_partitions(session: AsyncSession) -> List[str]:
+    """Drops monthly partitions whose whole range has expired.
+
+    `session` must be in autocommit: DETACH ... CONCURRENTLY cannot run in a
+    transaction. A plain DROP (or DETACH) would hold ACCESS EXCLUSIVE on
+    auth_sessions until commit, blocking logins and auth lookups. A detach
+    that was interrupted is left pending and is finished with FINALIZE."""
+    result = await session.execute(
+        text(
+            "SELECT c.relname, i.inhdetachpending "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'auth_sessions'::regclass"
+        )
+    )
+    current = _month_start(date.today())
+    dropped = []
+    for name, detach_pending in result.all():
+        if not name.startswith(AUTH_SESSION_PARTITION_PREFIX):
+            continue
+        try:
+            start = datetime.strptime(
+                name[len(AUTH_SESSION_PARTITION_PREFIX) :], "%Y%m"
+            ).date()
+        except ValueError:
+            continue
+        if start < current:
+            mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+            await session.execute(
+                text(f"ALTER TABLE auth_sessions DETACH PARTITION {name} {mode}")
+            )
+            await session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
+
+
+async def delete_expired_auth_sessions(limit: int, session: AsyncSession) -> int:
+    expired = (
+        select(AuthSession.id, AuthSession.expired_at)
+        .where(AuthSession.expired_at <= func.now())
+        .limit(limit)
+    )
+    stmt = delete(AuthSession).where(
+        tuple_(AuthSession.id, AuthSession.expired_at).in_(expired)
+    )
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
+async def delete_expired_revoked_auth_sessions(
+    limit: int, session: AsyncSession
+) -> int:
+    expired = (
+        select(RevokedAuthSession.id)
+        .where(RevokedAuthSession.expired_at <= func.now())
+        .limit(limit)
+    )
+    stmt = delete(RevokedAuthSession).where(RevokedAuthSession.id.in_(expired))
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
 async def create_user(data: dict, session: AsyncSession) -> User:
     try:
         stmt = insert(User).values(**data).returning(User)
         result = await session.execute(stmt)
-        await session.commit()
         return result.scalars().first()
     except Exception as e:
         print(f"Error create user -{data}")
 
 
+async def update_user(user_id: int, data: dict, session: AsyncSession) -> bool:
+    try:
+        stmt = update(User).values(**data).where(User.id == user_id)
+        result = await session.execute(stmt)
+        if result.rowcount and data.keys() & PRINCIPAL_FIELDS:
+            await events.publish_auth_eviction(session, user_id=user_id)
+        return bool(result.rowcount)
+    except Exception as e:
+        print(f"Error updating user - {user_id}")
+        return False
+
+
 async def get_user_by_id(user_id: int, session: AsyncSession) -> User:
     try:
         stmt = select(User).where(User.id == user_id)
@@ -51,9 +197,19 @@ async def get_user_by_id(user_id: int, session: AsyncSession) -> User:
         print(f"Error gretting user(id) -{user_id}")
 
 
+async def get_user_change_seq(user_id: int, session: AsyncSession) -> int:
+    stmt = select(User.change_seq).where(User.id == user_id)
+    result = await session.execute(stmt)
+    return result.scalar() or 0
+
+
 async def get_user_by_email(email: str, session: AsyncSession) -> User:
     try:
-        stmt = select(User).where(User.email == email)
+        stmt = (
+            select(User)
+            .options(load_only(User.id, User.password, User.is_active))
+            .where(User.email == email)
+        )
         result = await session.execute(stmt)
         return result.scalars().first()
     except Exception as e:
@@ -64,7 +220,6 @@ async def create_user_settings(data: dict, session: AsyncSession) -> UserSetting
     try:
         stmt = insert(UserSetting).values(**data).returning(UserSetting)
         result = await session.execute(stmt)
-        await session.commit()
         return result.scalars().first()
     except Exception as e:
         print(f"Error create user settings - {data}")
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Any, Optional, List
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, field_validator, model_validator
 from enum import Enum
 
 
@@ -30,6 +30,56 @@ class TaskOutSchema(BaseModel):
     updated_at: Optional[datetime]
 
 
+class TaskPageOutSchema(BaseModel):
+    items: List[TaskOutSchema]
+    next_cursor: Optional[str] = None
+
+
+class TaskBatchOperation(str, Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class TaskBatchItemInSchema(BaseModel):
+    op: TaskBatchOperation
+    id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[TaskStatus] = None
+
+    @model_validator(mode="after")
+    def operation_validate(self):
+        if self.op == TaskBatchOperation.create:
+            if not self.name:
+                raise ValueError("name is required for create")
+        elif self.id is None:
+            raise ValueError(f"id is required for {self.op.value}")
+        return self
+
+
+class TaskBatchInSchema(BaseModel):
+    operations: List[TaskBatchItemInSchema]
+
+
+class TaskBatchItemOutSchema(BaseModel):
+    index: int
+    op: TaskBatchOperation
+    ok: bool
+    task_id: Optional[int] = None
+    task: Optional[TaskOutSchema] = None
+    detail: Optional[str] = None
+
+
+class TaskBatchOutSchema(BaseModel):
+    results: List[TaskBatchItemOutSchema]
+
+
 class ProjectUpdateInSchema(BaseModel):
     name: Optional[str] = None
 
@@ -44,3 +94,35 @@ class ProjectOutSchema(BaseModel):
     is_active: bool
     is_default: bool
     created_at: datetime
+
+
+class ProjectPageOutSchema(BaseModel):
+    items: List[ProjectOutSchema]
+    next_cursor: Optional[str] = None
+
+
+class TaskCountsSchema(BaseModel):
+    new: int = 0
+    done: int = 0
+
+
+class ProjectWithCountsOutSchema(ProjectOutSchema):
+    task_counts: TaskCountsSchema
+
+
+class ProjectWithCountsPageOutSchema(BaseModel):
+    items: List[ProjectWithCountsOutSchema]
+    next_cursor: Optional[str] = None
+
+
+class TombstoneOutSchema(BaseModel):
+    entity: str
+    id: int
+    project_id: Optional[int]
+
+
+class SyncOutSchema(BaseModel):
+    projects: List[ProjectOutSchema]
+    tasks: List[TaskOutSchema]
+    deleted: List[TombstoneOutSchema]
+    next_token: str
@@ -41,3 +41,9 @@ class UserSchema(BaseModel):
     is_active: bool
     settings: UserSettingsSchema
     subscription: Optional[UserSubscriptionSchema]
+
+
+class AuthPrincipalSchema(BaseModel):
+    token: str
+    session_id: Optional[int] = None
+    user: UserSchema
@@ -0,0 +1,27 @@
+from typing import Any, List
+from fastapi import Response
+from pydantic import TypeAdapter
+from app.schemas import project as project_schemas
+
+# Built once at import. Endpoints that return a Response skip FastAPI's
+# response_model pass (validate -> jsonable python -> json.dumps), so the
+# response_model stays only for the OpenAPI schema.
+task_list_adapter = TypeAdapter(List[project_schemas.TaskOutSchema])
+project_list_adapter = TypeAdapter(List[project_schemas.ProjectOutSchema])
+task_page_adapter = TypeAdapter(project_schemas.TaskPageOutSchema)
+project_page_adapter = TypeAdapter(project_schemas.ProjectPageOutSchema)
+project_counts_page_adapter = TypeAdapter(
+    project_schemas.ProjectWithCountsPageOutSchema
+)
+sync_adapter = TypeAdapter(project_schemas.SyncOutSchema)
+
+
+def dump_json(adapter: TypeAdapter, data: Any) -> bytes:
+    """Validates ORM objects/rows/dicts once and serializes straight to bytes."""
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def json_response(adapter: TypeAdapter, data: Any, **kwargs) -> Response:
+    return Response(
+        content=dump_json(adapter, data), media_type="application/json", **kwargs
+    )
@@ -0,0 +1,52 @@
+"""Production entrypoint: python -m app.server
+
+Runs WEB_WORKERS uvicorn worker processes on uvloop + httptools. On SIGTERM
+each worker stops accepting connections, lets in-flight requests finish for
+up to WEB_GRACEFUL_TIMEOUT_SECONDS, then runs the lifespan shutdown, which
+disposes the database engine.
+"""
+import os
+import uvicorn
+from app import config
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: affinity mask, capped by a cgroup v2
+    quota (docker --cpus), which os.cpu_count() ignores."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count() -> int:
+    # the app is async, so one process per core saturates the CPU
+    return config.WEB_WORKERS or available_cpus()
+
+
+def main():
+    uvicorn.run(
+        "app.main:app",
+        host=config.WEB_HOST,
+        port=config.WEB_PORT,
+        workers=worker_count(),
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        backlog=config.WEB_BACKLOG,
+        timeout_keep_alive=config.WEB_KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=config.WEB_GRACEFUL_TIMEOUT_SECONDS,
+        reload=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
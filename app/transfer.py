@@ -0,0 +1,272 @@
+"""Bulk export/import of a user's projects and tasks.
+
+Both directions stream: export reads through a server-side cursor (NDJSON)
+or COPY TO STDOUT (CSV); import spools the request body to a temporary file,
+then parses it line by line and loads tasks with COPY in chunks. Memory stays
+constant in the data size. Both run inside the response body, after FastAPI
+has closed the request's dependencies, so each opens its own session.
+
+The body is spooled first because Starlette's StreamingResponse listens for
+the disconnect on `receive` while streaming: reading the body from the
+response generator would race it for the body messages.
+
+NDJSON lines, projects before the tasks that reference them:
+    {"type": "project", "id": 1, "name": "...", "is_active": true, "is_default": false, "created_at": "..."}
+    {"type": "task", "id": 7, "project_id": 1, "name": "...", "description": "...", "status": "new", ...}
+"""
+import asyncio
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, List, Optional
+import orjson
+from fastapi import HTTPException, Request, UploadFile, status
+from sqlalchemy import insert, select
+from app import config, events
+from app.database import async_session_maker, read_session_maker
+from app.models.project import Project, Task
+from app.queries import project as project_queries
+from app.schemas.project import TaskStatus
+
+EXPORT_PROJECT_COLUMNS = (
+    Project.id, Project.name, Project.is_active, Project.is_default, Project.created_at
+)
+TASK_COPY_COLUMNS = (
+    "name",
+    "description",
+    "status",
+    "user_id",
+    "project_id",
+    "created_at",
+    "updated_at",
+    "change_seq",
+)
+TASK_STATUSES = {status.value for status in TaskStatus}
+
+# asyncpg interpolates $1 itself: COPY takes no bind parameters
+EXPORT_CSV_QUERY = """
+    SELECT t.project_id, p.name AS project_name, t.id, t.name, t.description,
+           t.status, t.created_at, t.updated_at
+    FROM tasks t JOIN projects p ON p.id = t.project_id
+    WHERE t.user_id = $1 AND p.deleted_at IS NULL
+    ORDER BY t.project_id DESC, t.created_at
+"""
+
+
+async def export_ndjson(user_id: int) -> AsyncIterator[bytes]:
+    """Projects, then tasks grouped by project, from one REPEATABLE READ
+    snapshot so the file is consistent even while the user keeps writing."""
+    async with read_session_maker(user_id)() as session:
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        projects = await session.stream(
+            select(*EXPORT_PROJECT_COLUMNS)
+            .where(Project.user_id == user_id, Project.deleted_at.is_(None))
+            .order_by(Project.id)
+            .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+        )
+        async for rows in projects.mappings().partitions():
+            yield b"".join(
+                orjson.dumps({"type": "project", **row}) + b"\n" for row in rows
+            )
+        # backward scan of ix_tasks_user_id_project_id_created_at, no sort
+        tasks = await session.stream(
+            select(*project_queries.TASK_OUT_COLUMNS)
+            .where(
+                Task.user_id == user_id,
+                project_queries._task_in_live_project(user_id),
+            )
+            .order_by(Task.project_id.desc(), Task.created_at)
+            .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+        )
+        async for rows in tasks.mappings().partitions():
+            yield b"".join(orjson.dumps({"type": "task", **row}) + b"\n" for row in rows)
+
+
+async def export_csv(user_id: int) -> AsyncIterator[bytes]:
+    """Tasks with their project name, straight from COPY TO STDOUT."""
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=8)
+    async with read_session_maker(user_id)() as session:
+        connection = await session.connection()
+        driver = (await connection.get_raw_connection()).driver_connection
+
+        async def write(data):
+            await chunks.put(bytes(data))  # asyncpg reuses its buffer
+
+        async def copy():
+            try:
+                await driver.copy_from_query(
+                    EXPORT_CSV_QUERY, user_id, output=write, format="csv", header=True
+                )
+            finally:
+                await chunks.put(None)
+
+        copying = asyncio.ensure_future(copy())
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                yield chunk
+            await copying  # re-raises a COPY failure
+        finally:
+            copying.cancel()
+
+
+async def spool(request: Request) -> UploadFile:
+    """The request body in a temporary file, on disk past IMPORT_SPOOL_MEMORY."""
+    upload = UploadFile(SpooledTemporaryFile(max_size=config.IMPORT_SPOOL_MEMORY), size=0)
+    try:
+        async for chunk in request.stream():
+            if upload.size + len(chunk) > config.IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Import too large",
+                )
+            await upload.write(chunk)
+        await upload.seek(0)
+    except BaseException:
+        await upload.close()
+        raise
+    return upload
+
+
+async def _lines(upload: UploadFile) -> AsyncIterator[bytes]:
+    buffer = b""
+    while True:
+        chunk = await upload.read(64 * 1024)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > config.IMPORT_MAX_LINE_BYTES and b"\n" not in buffer:
+            raise ValueError(f"Line longer than {config.IMPORT_MAX_LINE_BYTES} bytes")
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+def _datetime(value) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _text(value, nullable: bool = False) -> Optional[str]:
+    """Names must be non-empty; nullable text (descriptions, "" by default
+    for API-created tasks) only has to be a string."""
+    if nullable:
+        if value is not None and not isinstance(value, str):
+            raise ValueError(value)
+        return value
+    if not isinstance(value, str) or not value:
+        raise ValueError(value)
+    return value
+
+
+def _progress(**data) -> bytes:
+    return orjson.dumps(data) + b"\n"
+
+
+async def import_ndjson(user_id: int, upload: UploadFile) -> AsyncIterator[bytes]:
+    """Loads a spooled export into the user's account in one transaction and yields
+    a progress line per COPY chunk, then {"done": true, ...} or {"error": ...}.
+
+    File project ids are mapped to new ones; the file's default project merges
+    into the user's own. Tasks of unknown projects and malformed lines are
+    counted as skipped. Everything gets one change_seq, so /sync picks the
+    import up as a single change. Closes `upload`.
+    """
+    async with async_session_maker() as session:
+        stats = {"projects": 0, "tasks": 0, "skipped": 0}
+        try:
+            change_seq = await project_queries.next_change_seq(user_id, session)
+            default_id = (
+                await session.execute(
+                    select(Project.id).where(
+                        Project.user_id == user_id,
+                        Project.is_default == True,
+                        Project.deleted_at.is_(None),
+                    )
+                )
+            ).scalar()
+            connection = await session.connection()
+            driver = (await connection.get_raw_connection()).driver_connection
+            project_ids: Dict[int, int] = {}  # id in the file -> new id
+            pending: Dict[int, dict] = {}  # projects not inserted yet
+            records: List[tuple] = []
+
+            async def insert_pending():
+                file_ids = list(pending)
+                result = await session.scalars(
+                    insert(Project).returning(Project.id, sort_by_parameter_order=True),
+                    list(pending.values()),
+                )
+                project_ids.update(zip(file_ids, result.all()))
+                stats["projects"] += len(file_ids)
+                pending.clear()
+
+            async for line in _lines(upload):
+                try:
+                    item = orjson.loads(line)
+                    kind = item["type"]
+                    if kind == "project":
+                        if item.get("is_default") and default_id:
+                            project_ids[item["id"]] = default_id
+                            continue
+                        pending[item["id"]] = {
+                            "name": _text(item["name"]),
+                            "is_active": bool(item.get("is_active", True)),
+                            "is_default": False,
+                            "user_id": user_id,
+                            "created_at": _datetime(item.get("created_at")) or datetime.now(),
+                            "change_seq": change_seq,
+                        }
+                        continue
+                    if kind != "task":
+                        raise ValueError(kind)
+                    if item["project_id"] in pending:
+                        await insert_pending()
+                    project_id = project_ids.get(item["project_id"])
+                    if project_id is None:
+                        raise KeyError(item["project_id"])
+                    status = item.get("status") or "new"
+                    records.append(
+                        (
+                            _text(item["name"]),
+                            _text(item.get("description"), nullable=True),
+                            status if status in TASK_STATUSES else "new",
+                            user_id,
+                            project_id,
+                            _datetime(item.get("created_at")) or datetime.now(),
+                            _datetime(item.get("updated_at")),
+                            change_seq,
+                        )
+                    )
+                except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                    stats["skipped"] += 1
+                    continue
+                if len(records) >= config.IMPORT_CHUNK_SIZE:
+                    await driver.copy_records_to_table(
+                        "tasks", records=records, columns=TASK_COPY_COLUMNS
+                    )
+                    stats["tasks"] += len(records)
+                    records = []
+                    yield _progress(**stats)
+            if pending:
+                await insert_pending()
+            if records:
+                await driver.copy_records_to_table(
+                    "tasks", records=records, columns=TASK_COPY_COLUMNS
+                )
+                stats["tasks"] += len(records)
+            await events.publish(
+                session, user_id, "import.done", {**stats, "change_seq": change_seq}
+            )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            print(f"Error importing - user:{user_id} {e}")
+            yield _progress(error="Import failed, nothing was imported", **stats)
+            return
+        finally:
+            await upload.close()
+        yield _progress(done=True, **stats)
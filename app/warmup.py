@@ -0,0 +1,142 @@
+"""Startup warm-up, run from the lifespan before the worker takes traffic.
+
+Without it the first requests after a deploy open the pool connections
+(TCP, auth, asyncpg type introspection), compile every statement in
+SQLAlchemy and prepare it in asyncpg, all while clients wait. Warming
+opens WARMUP_CONNECTIONS connections per engine and runs the hot read
+statements on each: SQLAlchemy's compiled cache is per engine, asyncpg's
+prepared statements are per connection. Ids are 0 so nothing matches.
+Writes are left cold: they need a real user row to run.
+"""
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from datetime import datetime
+from time import perf_counter
+from typing import Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from app import config, serializers
+from app.database import engine, replica_engines
+from app.queries import project as project_queries
+from app.queries import user as user_queries
+
+logger = logging.getLogger("app.warmup")
+
+
+async def _hot_statements(session: AsyncSession):
+    # the same optional arguments as the endpoints, so the cache keys match
+    now = datetime.now()
+    limit = config.PAGE_SIZE_DEFAULT + 1
+    await user_queries.get_auth_session("", session)
+    await user_queries.get_user_by_email("", session)
+    await user_queries.get_user_change_seq(0, session)
+    await project_queries.get_project_rows(0, session, limit=limit)
+    await project_queries.get_project_rows(0, session, limit=limit, after=(now, 0))
+    await project_queries.get_task_counts(0, [0], session)
+    await project_queries.get_project(0, 0, session)
+    await project_queries.get_task_rows(0, 0, session, limit=limit)
+    await project_queries.get_task_rows(0, 0, session, limit=limit, before=(now, 0))
+    await project_queries.get_task(0, 0, 0, session)
+    await project_queries.search_tasks(0, "warmup", session, limit=limit)
+    await project_queries.get_changes(0, 0, 0, session)
+
+
+async def _warm_connection(connection: AsyncConnection) -> int:
+    """Statements that ran: the query functions swallow their own errors."""
+    executed = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal executed
+        executed += 1
+
+    session = AsyncSession(bind=connection)
+    event.listen(connection.sync_connection, "after_cursor_execute", count)
+    try:
+        await _hot_statements(session)
+    finally:
+        event.remove(connection.sync_connection, "after_cursor_execute", count)
+        await session.close()
+    return executed
+
+
+async def _warm_engine(db_engine: AsyncEngine) -> Tuple[int, int]:
+    """(connections, statements). Opens the connections all at once, so each
+    one is a new pool member; they are checked back in (and kept, up to
+    DB_POOL_SIZE) on exit."""
+    count = min(config.WARMUP_CONNECTIONS, config.DB_POOL_SIZE)
+    async with AsyncExitStack() as stack:
+        # opened before they go on the stack: entering contexts on one stack
+        # from concurrent tasks is not safe
+        opened = await asyncio.gather(
+            *(db_engine.connect().start() for _ in range(count)),
+            return_exceptions=True,
+        )
+        connections = [c for c in opened if isinstance(c, AsyncConnection)]
+        for connection in connections:
+            stack.push_async_callback(connection.close)
+        failed = [c for c in opened if isinstance(c, BaseException)]
+        if failed:
+            # the opened ones are closed on the way out
+            raise failed[0]
+        statements = await asyncio.gather(*map(_warm_connection, connections))
+    return len(connections), sum(statements)
+
+
+def _warm_serializers():
+    project = {
+        "id": 0,
+        "name": "",
+        "is_active": True,
+        "is_default": False,
+        "created_at": datetime.now(),
+    }
+    task = {
+        "id": 0,
+        "name": "",
+        "description": None,
+        "status": "new",
+        "project_id": 0,
+        "created_at": datetime.now(),
+        "updated_at": None,
+    }
+    serializers.dump_json(serializers.project_list_adapter, [project])
+    serializers.dump_json(serializers.task_list_adapter, [task])
+    serializers.dump_json(serializers.project_page_adapter, {"items": [project]})
+    serializers.dump_json(serializers.task_page_adapter, {"items": [task]})
+    serializers.dump_json(
+        serializers.project_counts_page_adapter,
+        {"items": [{**project, "task_counts": {"new": 0, "done": 0}}]},
+    )
+    serializers.dump_json(
+        serializers.sync_adapter,
+        {
+            "projects": [project],
+            "tasks": [task],
+            "deleted": [{"entity": "task", "id": 0, "project_id": 0}],
+            "next_token": "",
+        },
+    )
+
+
+async def warm_up() -> dict:
+    """Logs and returns what was warmed. An engine that fails is left cold:
+    a cold worker is still a working one."""
+    started = perf_counter()
+    _warm_serializers()
+    engines = (engine, *replica_engines)
+    results = await asyncio.gather(*map(_warm_engine, engines), return_exceptions=True)
+    warmed = [result for result in results if not isinstance(result, BaseException)]
+    errors = [repr(result) for result in results if isinstance(result, BaseException)]
+    stats = {
+        "engines": len(engines),
+        "connections": sum(connections for connections, _ in warmed),
+        "statements": sum(statements for _, statements in warmed),
+        "errors": errors,
+        "seconds": round(perf_counter() - started, 3),
+    }
+    if errors:
+        logger.warning("warm-up incomplete, cold engines left: %s", stats)
+    else:
+        logger.info("warm-up done: %s", stats)
+    return stats
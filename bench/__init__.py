@@ -0,0 +1,43 @@
+"""Load tests and benchmarks for the API.
+
+Start a disposable Postgres and migrate it::
+
+    docker compose -f docker-compose.bench.yaml up -d
+    export POSTGRES_USER=bench POSTGRES_PASSWORD=bench POSTGRES_DB=bench \\
+        POSTGRES_HOST=localhost:5433 SECRET_KEY=bench
+    alembic upgrade head
+
+Seed N users x M projects x K tasks, then run the scenarios in-process
+(or against a running server with --base-url)::
+
+    python -m bench seed --users 100 --projects 10 --tasks 1000
+    python -m bench run --concurrency 20 --iterations 50
+
+`run` prints p50/p95/p99 latency, throughput and, in-process, the number of
+SQL statements per endpoint; --json writes the same report to a file.
+
+Serialization paths alone, without a database::
+
+    python -m bench serialize --tasks 1000
+
+ORM instances vs column rows on a large seeded project::
+
+    python -m bench queries --seed-run default
+
+Export -> import round trip (non-zero exit when anything is lost)::
+
+    python -m bench roundtrip --tasks 500
+
+Plans of the lookup reads (non-zero exit on a Seq Scan of auth_sessions,
+projects or tasks)::
+
+    python -m bench explain --seed-run default
+
+Regression checks (non-zero exit when one fails)::
+
+    python -m bench check
+
+Import time of app.main against a budget (non-zero exit when over)::
+
+    python -m bench importtime --budget-ms 1000
+"""
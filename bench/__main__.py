@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+from bench import checks, explain, importtime, queries, scenarios, seed, serialization, transfer
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="bulk-load users, projects and tasks")
+    seed_parser.add_argument("--users", type=int, default=10)
+    seed_parser.add_argument("--projects", type=int, default=5, help="per user, plus Default")
+    seed_parser.add_argument("--tasks", type=int, default=100, help="per project")
+    seed_parser.add_argument("--run", default="default", help="email namespace of the seeded users")
+
+    run_parser = commands.add_parser("run", help="run the API scenarios and report latency")
+    run_parser.add_argument("--concurrency", type=int, default=10)
+    run_parser.add_argument("--iterations", type=int, default=20)
+    run_parser.add_argument("--base-url", help="drive a running server instead of the app in-process")
+    run_parser.add_argument("--seed-run", default="default", help="read journeys log in as users of this seed run")
+    run_parser.add_argument("--seeded-users", type=int, default=0, help="how many seeded users to pick from; 0 disables read journeys")
+    run_parser.add_argument("--json", help="also write the report to this file")
+
+    serialize_parser = commands.add_parser("serialize", help="compare response serialization paths")
+    serialize_parser.add_argument("--tasks", type=int, default=1000, help="tasks per page")
+    serialize_parser.add_argument("--repeat", type=int, default=50)
+
+    queries_parser = commands.add_parser("queries", help="compare ORM and column-row task reads")
+    queries_parser.add_argument("--seed-run", default="default", help="read the largest project of this seed run")
+    queries_parser.add_argument("--repeat", type=int, default=5)
+
+    importtime_parser = commands.add_parser("importtime", help="check the import time of app.main")
+    importtime_parser.add_argument("--budget-ms", type=float, default=1000)
+    importtime_parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters; the fastest counts")
+    importtime_parser.add_argument("--top", type=int, default=15)
+
+    roundtrip_parser = commands.add_parser("roundtrip", help="check that an export imports back unchanged")
+    roundtrip_parser.add_argument("--tasks", type=int, default=500)
+    roundtrip_parser.add_argument("--base-url", help="drive a running server instead of the app in-process")
+
+    explain_parser = commands.add_parser("explain", help="check that the lookup reads use indexes")
+    explain_parser.add_argument("--seed-run", default="default", help="explain the reads of a user of this seed run")
+    explain_parser.add_argument("--verbose", action="store_true", help="print every plan, not only failing ones")
+
+    check_parser = commands.add_parser("check", help="run the regression checks")
+    check_parser.add_argument("names", nargs="*", metavar="name", help=f"default: all of {', '.join(checks.CHECKS)}")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        print(asyncio.run(seed.seed(args.users, args.projects, args.tasks, args.run)))
+        return
+    if args.command == "serialize":
+        results = asyncio.run(serialization.compare(args.tasks, args.repeat))
+        print(serialization.render(results, args.tasks))
+        return
+    if args.command == "queries":
+        print(queries.render(asyncio.run(queries.compare(args.seed_run, args.repeat))))
+        return
+    if args.command == "roundtrip":
+        results = asyncio.run(transfer.roundtrip(args.tasks, args.base_url))
+        print(transfer.render(results))
+        if not transfer.ok(results):
+            raise SystemExit("round trip changed the data")
+        return
+    if args.command == "check":
+        unknown = set(args.names) - set(checks.CHECKS)
+        if unknown:
+            parser.error(f"unknown checks: {', '.join(sorted(unknown))}")
+        results = asyncio.run(checks.run(args.names))
+        print(checks.render(results))
+        if any(error is not None for error in results.values()):
+            raise SystemExit("checks failed")
+        return
+    if args.command == "explain":
+        plans = asyncio.run(explain.explain(args.seed_run))
+        print(explain.render(plans, args.verbose))
+        if explain.seq_scans(plans):
+            raise SystemExit("sequential scans in lookup plans")
+        return
+    if args.command == "importtime":
+        results = importtime.compare(args.repeat)
+        print(importtime.render(results, args.budget_ms, args.top))
+        if results["total_ms"] > args.budget_ms:
+            raise SystemExit(f"over budget by {results['total_ms'] - args.budget_ms:.0f} ms")
+        return
+
+    recorder = asyncio.run(
+        scenarios.run(
+            concurrency=args.concurrency,
+            iterations=args.iterations,
+            base_url=args.base_url,
+            seed_run=args.seed_run,
+            seeded_users=args.seeded_users,
+        )
+    )
+    print(recorder.render())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(recorder.summary(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
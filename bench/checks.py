@@ -0,0 +1,105 @@
+"""Regression checks for behaviour the load scenarios don't assert on::
+
+    python -m bench check
+    python -m bench check read_your_writes
+
+Each check prints ok or what went wrong; exits non-zero when one fails.
+Checks that need settings fixed at import time run in a fresh interpreter.
+"""
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+import httpx
+
+_READ_YOUR_WRITES = """
+from app import database
+assert database.replica_engines, "no replica engines"
+database.mark_write(1)
+for user_id in range(2, 20002):
+    database.mark_write(user_id)
+assert database.read_session_maker(1) is database.async_session_maker, "user 1 reads a replica"
+assert database.read_session_maker(0) is not database.async_session_maker, "user 0 reads the primary"
+"""
+
+
+def _subprocess(code: str, env: Dict[str, str]) -> Optional[str]:
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **env},
+    )
+    if completed.returncode:
+        return completed.stderr.strip().splitlines()[-1]
+    return None
+
+
+async def read_your_writes() -> Optional[str]:
+    """Recent writers stay on the primary with the auth cache off and with
+    more writers than it would hold. Engines connect lazily, so the replica
+    host does not have to exist."""
+    return _subprocess(
+        _READ_YOUR_WRITES,
+        {
+            "AUTH_CACHE_MAX_SIZE": "0",
+            "POSTGRES_REPLICA_HOSTS": os.getenv("POSTGRES_REPLICA_HOSTS") or "replica.invalid",
+        },
+    )
+
+
+async def _login(http: httpx.AsyncClient):
+    """Registers a fresh user and sends its token with every request."""
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    password = uuid.uuid4().hex
+    await http.post(
+        "/auth/register", json={"email": email, "full_name": "Bench", "password": password}
+    )
+    response = await http.post("/auth/token", json={"email": email, "password": password})
+    response.raise_for_status()
+    http.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+
+async def updated_since_utc() -> Optional[str]:
+    """?updated_since with a UTC offset ("Z") filters like its naive UTC value."""
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        await _login(http)
+        project_id = (await http.post("/projects", json={"name": "Check"})).json()["id"]
+        await http.post(f"/projects/{project_id}/tasks", json={"name": "Task"})
+        now = datetime.now(timezone.utc)
+        for since, expected in (
+            ((now - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"), 1),
+            ((now + timedelta(hours=1)).astimezone(timezone(timedelta(hours=2))).isoformat(), 0),
+        ):
+            response = await http.get(
+                f"/projects/{project_id}/tasks", params={"updated_since": since}
+            )
+            if response.status_code != 200:
+                return f"updated_since={since}: {response.status_code}"
+            found = len(response.json()["items"])
+            if found != expected:
+                return f"updated_since={since}: {found} tasks, expected {expected}"
+    return None
+
+
+CHECKS: Dict[str, Callable[[], Awaitable[Optional[str]]]] = {
+    "read_your_writes": read_your_writes,
+    "updated_since_utc": updated_since_utc,
+}
+
+
+async def run(names=None) -> Dict[str, Optional[str]]:
+    """name -> None when the check passed, else what failed."""
+    return {name: await CHECKS[name]() for name in names or CHECKS}
+
+
+def render(results: Dict[str, Optional[str]]) -> str:
+    return "\n".join(
+        f"{name:<24} {'ok' if error is None else 'FAIL: ' + error}"
+        for name, error in results.items()
+    )
@@ -0,0 +1,127 @@
+"""Query plans of the lookup reads on the seeded bench database.
+
+Runs the read queries the endpoints use for a seeded user (auth session by
+token, user by email, project and task lists, single rows, counts, search,
+sync), records the SQL they send and EXPLAINs each statement with its own
+parameters::
+
+    python -m bench seed --users 100 --projects 10 --tasks 1000
+    python -m bench explain --seed-run default
+
+Exits non-zero when a plan still has a Seq Scan on auth_sessions (or one of
+its partitions), projects or tasks, i.e. a lookup index is missing or
+unusable. enable_seqscan is off while explaining: a small table (a fresh
+bench DB has few auth sessions) is otherwise scanned simply because that
+is cheaper, and the check is whether an index can serve the lookup at all.
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import config
+from app.database import engine
+from app.models.project import Task
+from app.models.user import AuthSession, User
+from app.queries import project as project_queries
+from app.queries import user as user_queries
+from bench.seed import seed_emails
+
+_SEQ_SCAN = re.compile(r"Seq Scan on (auth_sessions\w*|projects|tasks)\b")
+
+
+async def _seeded(session: AsyncSession, seed_run: str) -> Tuple[int, str, int, int, str]:
+    """(user id, email, largest project id, one of its task ids, a token)."""
+    email = seed_emails(seed_run, 1)[0]
+    row = (
+        await session.execute(
+            select(Task.user_id, Task.project_id, func.max(Task.id))
+            .join(User, User.id == Task.user_id)
+            .where(User.email == email)
+            .group_by(Task.user_id, Task.project_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+    ).first()
+    if row is None:
+        raise SystemExit(f"no seeded tasks for run {seed_run!r}; run `bench seed` first")
+    token = await session.scalar(select(AuthSession.token).limit(1))
+    return row[0], email, row[1], row[2], token or "bench"
+
+
+async def _lookups(session: AsyncSession, seed_run: str) -> List[Tuple[str, object]]:
+    """(name, read) of every lookup checked, arguments as the endpoints pass them."""
+    user_id, email, project_id, task_id, token = await _seeded(session, seed_run)
+    now = datetime.now()
+    limit = config.PAGE_SIZE_DEFAULT + 1
+    return [
+        ("auth session by token", lambda: user_queries.get_auth_session(token, session)),
+        ("user by email", lambda: user_queries.get_user_by_email(email, session)),
+        ("projects page", lambda: project_queries.get_project_rows(user_id, session, limit=limit)),
+        (
+            "projects next page",
+            lambda: project_queries.get_project_rows(user_id, session, limit=limit, after=(now, 0)),
+        ),
+        ("task counts", lambda: project_queries.get_task_counts(user_id, [project_id], session)),
+        ("project", lambda: project_queries.get_project(project_id, user_id, session)),
+        (
+            "tasks page",
+            lambda: project_queries.get_task_rows(user_id, project_id, session, limit=limit),
+        ),
+        (
+            "tasks next page",
+            lambda: project_queries.get_task_rows(
+                user_id, project_id, session, limit=limit, before=(now, task_id)
+            ),
+        ),
+        ("task", lambda: project_queries.get_task(task_id, project_id, user_id, session)),
+        ("search", lambda: project_queries.search_tasks(user_id, "task", session, limit=limit)),
+        ("sync", lambda: project_queries.get_changes(user_id, 0, 1, session)),
+    ]
+
+
+async def explain(seed_run: str = "default") -> Dict[str, List[str]]:
+    """Plan lines of every statement, keyed "<lookup> #<n>"."""
+    async with engine.connect() as connection:
+        session = AsyncSession(bind=connection)
+        lookups = await _lookups(session, seed_run)
+        sent: List[Tuple[str, str, object]] = []
+        name = None
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            sent.append((name, statement, parameters))
+
+        event.listen(connection.sync_connection, "before_cursor_execute", record)
+        try:
+            for name, read in lookups:
+                await read()
+        finally:
+            event.remove(connection.sync_connection, "before_cursor_execute", record)
+            await session.close()
+
+        plans = {}
+        await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for n, (name, statement, parameters) in enumerate(sent):
+            result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            plans[f"{name} #{n}"] = list(result.scalars())
+        await connection.rollback()
+    return plans
+
+
+def seq_scans(plans: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {
+        name: [match.group(1) for line in plan for match in _SEQ_SCAN.finditer(line)]
+        for name, plan in plans.items()
+        if any(_SEQ_SCAN.search(line) for line in plan)
+    }
+
+
+def render(plans: Dict[str, List[str]], verbose: bool = False) -> str:
+    scans = seq_scans(plans)
+    lines = []
+    for name, plan in plans.items():
+        status = f"Seq Scan on {', '.join(scans[name])}" if name in scans else "ok"
+        lines.append(f"{name:<32} {status}")
+        if verbose or name in scans:
+            lines.extend(f"    {line}" for line in plan)
+    return "\n".join(lines)
@@ -0,0 +1,73 @@
+"""Import-time budget for `app.main`, from `python -X importtime`.
+
+Every worker pays it on start (and again on each restart), before the
+lifespan warm-up even begins. Imports in a fresh interpreter --repeat times
+and keeps the fastest run, then lists the slowest packages::
+
+    python -m bench importtime --budget-ms 1000
+
+Exits non-zero when the budget is exceeded, so CI can run it as a check.
+"""
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULE = "app.main"
+
+
+def _measure() -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) in import order, nesting kept in the name."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode:
+        raise SystemExit(f"importing {MODULE} failed:\n{completed.stderr}")
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if self_us.strip() == "self [us]":
+            continue
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _subtree(rows: List[Tuple[str, int, int]]) -> List[Tuple[str, int, int]]:
+    """MODULE and what it imported: children are listed before their parent,
+    back to the previous top-level (one space deep) module."""
+    end = next(i for i, (name, _, _) in enumerate(rows) if name.strip() == MODULE)
+    start = end
+    while start and rows[start - 1][0].startswith("  "):
+        start -= 1
+    return rows[start : end + 1]
+
+
+def compare(repeat: int = 3) -> Dict[str, object]:
+    """Total and self time of MODULE in ms, and (module, us) of its direct
+    imports and of app's own modules, slowest first."""
+    runs = [_subtree(_measure()) for _ in range(repeat)]
+    rows = min(runs, key=lambda run: run[-1][2])
+    modules = {
+        name.strip(): cumulative
+        for name, _, cumulative in rows[:-1]
+        if (name.startswith("   ") and not name.startswith("    "))
+        or name.strip().startswith("app.")
+    }
+    return {
+        "total_ms": rows[-1][2] / 1000,
+        "self_ms": rows[-1][1] / 1000,
+        "modules": sorted(modules.items(), key=lambda item: -item[1]),
+    }
+
+
+def render(results: Dict[str, object], budget_ms: float, top: int = 15) -> str:
+    lines = [
+        f"import {MODULE}: {results['total_ms']:.1f} ms "
+        f"({results['self_ms']:.1f} ms in the module itself), budget {budget_ms:.0f} ms",
+    ]
+    for name, cumulative in results["modules"][:top]:
+        lines.append(f"  {name:<40} {cumulative / 1000:>8.1f} ms")
+    return "\n".join(lines)
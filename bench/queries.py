@@ -0,0 +1,78 @@
+"""ORM entities vs column rows for the task list read path.
+
+Reads the largest project of a seeded user in full (no page limit) and
+serializes it, once through `get_tasks` (Task instances) and once through
+`get_task_rows` (column dicts). Reports wall time and, in a separate pass so
+tracing does not skew the timing, the Python heap peak per read::
+
+    python -m bench seed --users 1 --projects 1 --tasks 20000 --run queries
+    python -m bench queries --seed-run queries
+"""
+import time
+import tracemalloc
+from typing import Dict
+from sqlalchemy import func, select
+from app import serializers
+from app.database import async_session_maker
+from app.models.project import Task
+from app.models.user import User
+from app.queries import project as project_queries
+from bench.seed import seed_emails
+
+
+async def _largest_project(seed_run: str):
+    async with async_session_maker() as session:
+        row = (
+            await session.execute(
+                select(Task.user_id, Task.project_id, func.count())
+                .join(User, User.id == Task.user_id)
+                .where(User.email == seed_emails(seed_run, 1)[0])
+                .group_by(Task.user_id, Task.project_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            )
+        ).first()
+    if row is None:
+        raise SystemExit(f"no seeded tasks for run {seed_run!r}; run `bench seed` first")
+    return row
+
+
+async def _read(read, user_id: int, project_id: int) -> bytes:
+    async with async_session_maker() as session:
+        items = await read(user_id=user_id, project_id=project_id, session=session)
+        return serializers.dump_json(serializers.task_list_adapter, items)
+
+
+async def _measure(read, user_id: int, project_id: int, repeat: int):
+    await _read(read, user_id, project_id)  # warm-up: pool, statement cache
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await _read(read, user_id, project_id)
+    elapsed = (time.perf_counter() - started) / repeat
+    tracemalloc.start()
+    await _read(read, user_id, project_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def compare(seed_run: str = "default", repeat: int = 5) -> Dict[str, tuple]:
+    """(seconds, peak bytes) per strategy, plus the task count under "tasks"."""
+    user_id, project_id, count = await _largest_project(seed_run)
+    results = {"tasks": (count, 0)}
+    for name, read in (
+        ("ORM select(Task)", project_queries.get_tasks),
+        ("Core select(*TASK_OUT_COLUMNS)", project_queries.get_task_rows),
+    ):
+        results[name] = await _measure(read, user_id, project_id, repeat)
+    return results
+
+
+def render(results: Dict[str, tuple]) -> str:
+    count = results.pop("tasks")[0]
+    lines = [f"{count} tasks, read and serialized in full"]
+    for name, (seconds, peak) in results.items():
+        lines.append(
+            f"{name:<32} {seconds * 1000:>9.1f} ms  {peak / 1024 / 1024:>7.1f} MiB peak"
+        )
+    return "\n".join(lines)
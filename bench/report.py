@@ -0,0 +1,87 @@
+"""Latency/throughput aggregation and per-endpoint SQL statement counting."""
+import contextvars
+import statistics
+from collections import defaultdict
+from typing import Dict, List, Optional
+from sqlalchemy import event
+
+# set by the scenario runner around each request; the app runs in the same
+# context when driven in-process, so engine events can attribute statements
+_current = contextvars.ContextVar("bench_request", default=None)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.elapsed = 0.0
+
+    def start(self) -> dict:
+        counter = {"queries": 0}
+        _current.set(counter)
+        return counter
+
+    def add(
+        self, name: str, seconds: float, ok: bool, queries: Optional[int] = None
+    ):
+        self.latencies[name].append(seconds)
+        if queries is not None:
+            self.queries[name].append(queries)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self) -> List[dict]:
+        rows = []
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            rows.append(
+                {
+                    "endpoint": name,
+                    "requests": len(values),
+                    "errors": self.errors.get(name, 0),
+                    "p50_ms": _percentile(values, 50) * 1000,
+                    "p95_ms": _percentile(values, 95) * 1000,
+                    "p99_ms": _percentile(values, 99) * 1000,
+                    "rps": len(values) / self.elapsed if self.elapsed else 0.0,
+                    "queries": (
+                        statistics.mean(self.queries[name])
+                        if self.queries.get(name)
+                        else None
+                    ),
+                }
+            )
+        return rows
+
+    def render(self) -> str:
+        header = f"{'endpoint':<40} {'req':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'sql/req':>8}"
+        lines = [header, "-" * len(header)]
+        for row in self.summary():
+            queries = "-" if row["queries"] is None else f"{row['queries']:.1f}"
+            lines.append(
+                f"{row['endpoint']:<40} {row['requests']:>6} {row['errors']:>4} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                f"{row['rps']:>8.1f} {queries:>8}"
+            )
+        total = sum(len(v) for v in self.latencies.values())
+        lines.append(
+            f"\n{total} requests in {self.elapsed:.1f}s ({total / self.elapsed if self.elapsed else 0:.1f} req/s)"
+        )
+        return "\n".join(lines)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def install_query_counter(engine) -> None:
+    """Counts statements on `engine` (an AsyncEngine) per bench request."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter = _current.get()
+        if counter is not None:
+            counter["queries"] += 1
@@ -0,0 +1,153 @@
+"""Scripted user journeys driven through httpx, in-process or against a server."""
+import asyncio
+import random
+import time
+import uuid
+from typing import Optional
+import httpx
+from bench.report import Recorder
+from bench.seed import SEED_PASSWORD, seed_emails
+
+
+class Client:
+    def __init__(self, http: httpx.AsyncClient, recorder: Recorder, count_queries: bool):
+        self.http = http
+        self.recorder = recorder
+        self.count_queries = count_queries
+        self.headers = {}
+
+    async def call(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        counter = self.recorder.start() if self.count_queries else None
+        started = time.perf_counter()
+        response = await self.http.request(method, url, headers=self.headers, **kwargs)
+        self.recorder.add(
+            name,
+            time.perf_counter() - started,
+            response.status_code < 400,
+            counter["queries"] if counter else None,
+        )
+        return response
+
+    async def login(self, email: str, password: str) -> bool:
+        response = await self.call(
+            "POST /auth/token",
+            "POST",
+            "/auth/token",
+            json={"email": email, "password": password},
+        )
+        if response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        return True
+
+
+async def crud_journey(client: Client, iterations: int):
+    """register -> login -> project + task CRUD"""
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    password = uuid.uuid4().hex
+    await client.call(
+        "POST /auth/register",
+        "POST",
+        "/auth/register",
+        json={"email": email, "full_name": "Bench", "password": password},
+    )
+    if not await client.login(email, password):
+        return
+    await client.call("GET /me", "GET", "/me")
+    response = await client.call(
+        "POST /projects", "POST", "/projects", json={"name": "Bench project"}
+    )
+    project_id = response.json()["id"]
+    for n in range(iterations):
+        response = await client.call(
+            "POST /projects/{id}/tasks",
+            "POST",
+            f"/projects/{project_id}/tasks",
+            json={"name": f"Task {n}", "description": "bench"},
+        )
+        task_id = response.json()["id"]
+        await client.call(
+            "GET /projects/{id}/tasks/{id}",
+            "GET",
+            f"/projects/{project_id}/tasks/{task_id}",
+        )
+        await client.call(
+            "PUT /projects/{id}/tasks/{id}",
+            "PUT",
+            f"/projects/{project_id}/tasks/{task_id}",
+            json={"status": "done"},
+        )
+        await client.call("GET /projects", "GET", "/projects")
+        await client.call(
+            "GET /projects/{id}/tasks", "GET", f"/projects/{project_id}/tasks"
+        )
+        if n % 2:
+            await client.call(
+                "DELETE /projects/{id}/tasks/{id}",
+                "DELETE",
+                f"/projects/{project_id}/tasks/{task_id}",
+            )
+    await client.call(
+        "DELETE /projects/{id}", "DELETE", f"/projects/{project_id}"
+    )
+    await client.call("GET /auth/logout", "GET", "/auth/logout")
+
+
+async def read_journey(client: Client, email: str, iterations: int):
+    """login as a seeded user -> browse projects and task pages"""
+    if not await client.login(email, SEED_PASSWORD):
+        return
+    for _ in range(iterations):
+        response = await client.call("GET /projects", "GET", "/projects")
+        projects = response.json()["items"]
+        if not projects:
+            continue
+        project_id = random.choice(projects)["id"]
+        response = await client.call(
+            "GET /projects/{id}/tasks", "GET", f"/projects/{project_id}/tasks"
+        )
+        cursor = response.json()["next_cursor"]
+        if cursor:
+            await client.call(
+                "GET /projects/{id}/tasks?cursor",
+                "GET",
+                f"/projects/{project_id}/tasks",
+                params={"cursor": cursor},
+            )
+
+
+async def run(
+    concurrency: int,
+    iterations: int,
+    base_url: Optional[str] = None,
+    seed_run: Optional[str] = None,
+    seeded_users: int = 0,
+) -> Recorder:
+    recorder = Recorder()
+    in_process = base_url is None
+    if in_process:
+        from app.database import engine
+        from app.main import app
+        from bench.report import install_query_counter
+
+        install_query_counter(engine)
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+    else:
+        transport = None
+
+    emails = seed_emails(seed_run, seeded_users) if seed_run and seeded_users else []
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=60
+    ) as http:
+        started = time.perf_counter()
+        journeys = []
+        for n in range(concurrency):
+            client = Client(http, recorder, in_process)
+            if emails and n % 2:
+                journeys.append(read_journey(client, random.choice(emails), iterations))
+            else:
+                journeys.append(crud_journey(client, iterations))
+        await asyncio.gather(*journeys)
+        recorder.elapsed = time.perf_counter() - started
+    return recorder
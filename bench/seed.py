@@ -0,0 +1,99 @@
+"""Bulk data generator: users/projects through INSERT ... RETURNING, tasks through COPY."""
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+import asyncpg
+from app.auth import pwd_context
+from app.database import ASYNCPG_DSN
+
+SEED_PASSWORD = "bench-password"
+SEED_EMAIL = "bench-{run}-{index}@example.com"
+TASK_COPY_CHUNK = 50_000
+# everything a user is seeded with is one change, so /sync returns it
+SEED_CHANGE_SEQ = 1
+
+
+def seed_emails(run: str, users: int) -> List[str]:
+    return [SEED_EMAIL.format(run=run, index=i) for i in range(users)]
+
+
+async def seed(users: int, projects: int, tasks: int, run: str = "default") -> dict:
+    """Creates `users` users with a default + `projects` projects each and
+    `tasks` tasks per project. Every user's password is SEED_PASSWORD."""
+    started = time.perf_counter()
+    password = pwd_context.hash(SEED_PASSWORD)
+    conn = await asyncpg.connect(ASYNCPG_DSN)
+    try:
+        async with conn.transaction():
+            user_ids = [
+                row["id"]
+                for row in await conn.fetch(
+                    "INSERT INTO users (email, password, full_name, is_active, change_seq) "
+                    "SELECT email, $2, 'Bench User', true, $3 FROM unnest($1::text[]) AS email "
+                    "RETURNING id",
+                    seed_emails(run, users),
+                    password,
+                    SEED_CHANGE_SEQ,
+                )
+            ]
+            await conn.execute(
+                "INSERT INTO users_setting (user_id) SELECT unnest($1::int[])", user_ids
+            )
+            project_rows = await conn.fetch(
+                "INSERT INTO projects (name, is_active, is_default, user_id, change_seq) "
+                "SELECT CASE WHEN n = 0 THEN 'Default' ELSE 'Project ' || n END, "
+                "true, n = 0, user_id, $3 "
+                "FROM unnest($1::int[]) AS user_id, generate_series(0, $2) AS n "
+                "RETURNING id, user_id",
+                user_ids,
+                projects,
+                SEED_CHANGE_SEQ,
+            )
+            now = datetime.now()
+            records = []
+            total_tasks = 0
+            for project in project_rows:
+                for n in range(tasks):
+                    created_at = now - timedelta(seconds=random.randint(0, 86400 * 365))
+                    records.append(
+                        (
+                            f"Task {n}",
+                            "Generated by bench.seed",
+                            random.choice(("new", "done")),
+                            project["user_id"],
+                            project["id"],
+                            created_at,
+                            SEED_CHANGE_SEQ,
+                        )
+                    )
+                    if len(records) >= TASK_COPY_CHUNK:
+                        total_tasks += await _copy_tasks(conn, records)
+                        records = []
+            if records:
+                total_tasks += await _copy_tasks(conn, records)
+    finally:
+        await conn.close()
+    return {
+        "users": len(user_ids),
+        "projects": len(project_rows),
+        "tasks": total_tasks,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def _copy_tasks(conn: asyncpg.Connection, records: list) -> int:
+    await conn.copy_records_to_table(
+        "tasks",
+        records=records,
+        columns=[
+            "name",
+            "description",
+            "status",
+            "user_id",
+            "project_id",
+            "created_at",
+            "change_seq",
+        ],
+    )
+    return len(records)
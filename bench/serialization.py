@@ -0,0 +1,81 @@
+"""Serialization micro-benchmark: a page of tasks, no database involved.
+
+Compares FastAPI's response_model path (validate -> jsonable python ->
+JSONResponse / ORJSONResponse) with the TypeAdapter path used by the list
+endpoints (validate -> dump_json).
+"""
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app import serializers
+from app.schemas import project as project_schemas
+
+
+def make_tasks(count: int) -> List[SimpleNamespace]:
+    """Attribute objects standing in for ORM instances / rows."""
+    now = datetime.now()
+    return [
+        SimpleNamespace(
+            id=n,
+            name=f"Task {n}",
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
+            status="done" if n % 3 else "new",
+            project_id=1,
+            created_at=now - timedelta(minutes=n),
+            updated_at=None if n % 2 else now,
+        )
+        for n in range(count)
+    ]
+
+
+def _timeit(func: Callable[[], bytes], repeat: int) -> float:
+    func()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+async def _timeit_response_model(field, page, response_class, repeat: int) -> float:
+    async def render() -> bytes:
+        content = await serialize_response(field=field, response_content=page)
+        return response_class(content).body
+
+    await render()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await render()
+    return (time.perf_counter() - started) / repeat
+
+
+async def compare(count: int = 1000, repeat: int = 50) -> Dict[str, float]:
+    """Seconds per serialized page of `count` tasks, per strategy."""
+    page = {"items": make_tasks(count), "next_cursor": None}
+    field = create_model_field(
+        name="Response_get_tasks_api", type_=project_schemas.TaskPageOutSchema
+    )
+    return {
+        "response_model + JSONResponse": await _timeit_response_model(
+            field, page, JSONResponse, repeat
+        ),
+        "response_model + ORJSONResponse": await _timeit_response_model(
+            field, page, ORJSONResponse, repeat
+        ),
+        "TypeAdapter validate + dump_json": _timeit(
+            lambda: serializers.dump_json(serializers.task_page_adapter, page), repeat
+        ),
+    }
+
+
+def render(results: Dict[str, float], count: int) -> str:
+    baseline = next(iter(results.values()))
+    lines = [f"{count} tasks per page"]
+    for name, seconds in results.items():
+        lines.append(
+            f"{name:<35} {seconds * 1000:>8.2f} ms  x{baseline / seconds:.1f}"
+        )
+    return "\n".join(lines)
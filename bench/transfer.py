@@ -0,0 +1,106 @@
+"""Export -> import round trip through the API.
+
+Fills a fresh user through the same endpoints clients use (single creates,
+so descriptions get the API default of "", and batch creates), exports it
+as NDJSON, imports the file into a second fresh user and compares what the
+two accounts hold::
+
+    python -m bench roundtrip --tasks 500
+
+Exits non-zero when a task was skipped, lost or changed on the way.
+"""
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+import httpx
+import orjson
+
+
+async def _user(http: httpx.AsyncClient) -> Dict[str, str]:
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    password = uuid.uuid4().hex
+    await http.post(
+        "/auth/register",
+        json={"email": email, "full_name": "Bench", "password": password},
+    )
+    response = await http.post("/auth/token", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+async def _export(http: httpx.AsyncClient, headers: Dict[str, str]) -> bytes:
+    response = await http.get("/export", headers=headers)
+    response.raise_for_status()
+    return response.content
+
+
+def _contents(export: bytes) -> Counter:
+    """(project name, task name, description, status) of every task."""
+    lines = [orjson.loads(line) for line in export.splitlines() if line]
+    projects = {item["id"]: item["name"] for item in lines if item["type"] == "project"}
+    return Counter(
+        (projects[item["project_id"]], item["name"], item["description"], item["status"])
+        for item in lines
+        if item["type"] == "task"
+    )
+
+
+async def roundtrip(tasks: int = 500, base_url: Optional[str] = None) -> dict:
+    transport = None
+    if base_url is None:
+        from app.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=300) as http:
+        source = await _user(http)
+        project = await http.post("/projects", json={"name": "Round trip"}, headers=source)
+        project_id = project.json()["id"]
+        singles = min(tasks, 50)
+        for n in range(singles):
+            await http.post(
+                f"/projects/{project_id}/tasks", json={"name": f"Task {n}"}, headers=source
+            )
+        operations = [
+            {"op": "create", "name": f"Batch task {n}", "status": "done"}
+            for n in range(singles, tasks)
+        ]
+        for start in range(0, len(operations), 500):
+            await http.post(
+                f"/projects/{project_id}/tasks:batch",
+                json={"operations": operations[start : start + 500]},
+                headers=source,
+            )
+        exported = await _export(http, source)
+
+        target = await _user(http)
+        response = await http.post("/import", content=exported, headers=target)
+        progress: List[dict] = [
+            orjson.loads(line) for line in response.content.splitlines() if line
+        ]
+        reimported = await _export(http, target)
+    expected, actual = _contents(exported), _contents(reimported)
+    return {
+        "exported": sum(expected.values()),
+        "result": progress[-1] if progress else {},
+        "missing": sum((expected - actual).values()),
+        "unexpected": sum((actual - expected).values()),
+    }
+
+
+def render(results: dict) -> str:
+    return (
+        f"exported {results['exported']} tasks, import said {results['result']}, "
+        f"{results['missing']} missing and {results['unexpected']} unexpected after re-export"
+    )
+
+
+def ok(results: dict) -> bool:
+    result = results["result"]
+    return (
+        result.get("done") is True
+        and result.get("skipped") == 0
+        and result.get("tasks") == results["exported"]
+        and not results["missing"]
+        and not results["unexpected"]
+    )